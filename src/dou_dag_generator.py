@@ -4,6 +4,12 @@ searches terms in the Gazzete [Diário Oficial da União-DOU] and send it
 by email to the  provided `recipient_emails` list. The DAGs are
 generated by YAML config files at `dag_confs` folder.
 
+This module is imported by the scheduler on every parse loop, so it
+imports only what is needed to build the DAG objects. Modules used only
+when the tasks run (the database and Slack providers, the
+searchers and the notification stack) are imported inside the task
+callables.
+
 TODO:
 [] - Definir sufixo do título do email a partir de configuração
 """
@@ -12,80 +18,139 @@ import logging
 import os
 import sys
 import textwrap
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
-from functools import reduce
-import json
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+from functools import partial
+from random import random
 
-import pandas as pd
 from airflow import DAG, Dataset
 from airflow.utils.task_group import TaskGroup
 from airflow.hooks.base import BaseHook
 from airflow.operators.empty import EmptyOperator
 from airflow.operators.python import BranchPythonOperator, PythonOperator
-from airflow.providers.microsoft.mssql.hooks.mssql import MsSqlHook
-from airflow.providers.postgres.hooks.postgres import PostgresHook
-from airflow.providers.slack.notifications.slack import SlackNotifier
 from airflow.timetables.datasets import DatasetOrTimeSchedule
 from airflow.timetables.trigger import CronTriggerTimetable
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from utils.checkpoint import SearchCheckpoint
+from utils.parse_guard import guard_metadata_access
+from utils.result_store import ResultStore, is_reference
+from utils.search_result import SearchResult, intern_result, merge_results
+from utils.term_list import TermList
 from utils.date import get_trigger_date, template_ano_mes_dia_trigger_local_time
-from notification.notifier import Notifier
-from parsers import DAGConfig, YAMLParser
+from harvest import (
+    HARVEST_DAG_ID,
+    HARVEST_DATASET,
+    HarvestStore,
+    collect_harvest_targets,
+    harvest_key,
+    uses_harvest,
+)
+from notification.failure_notifier import SlackFailureNotifier
+from parsers import CachedYAMLParser, DAGConfig, YAMLParser
 from schemas import FetchTermsConfig
-from searchers import BaseSearcher, DOUSearcher, QDSearcher, INLABSSearcher
+from schedule_spreader import load_plan
+from sharding import select_shard
+
+if TYPE_CHECKING:
+    from searchers import BaseSearcher
 
 
-SearchResult = Dict[str, Dict[str, Dict[str, List[dict]]]]
+TERMS_FETCH_BATCH_SIZE = 5000
 
 
-def merge_results(*dicts: SearchResult) -> SearchResult:
+def fetch_columns(db_hook, sql: str, server_side: bool = False) -> List[list]:
+    """Runs `sql` through a cursor of `db_hook` and returns the
+    result by column, fetching `TERMS_FETCH_BATCH_SIZE` rows at a time.
+    With `server_side` a named (server side) cursor is used, so that
+    the database, and not the driver, holds the rows not fetched yet.
     """
-    Merge multiple dictionaries and sum/concatenate values of common keys,
-    including nested dictionaries.
+    columns = []
+    with closing(db_hook.get_conn()) as conn:
+        cursor = conn.cursor("ro_dou_terms") if server_side else conn.cursor()
+        with closing(cursor):
+            cursor.execute(sql)
+            while True:
+                rows = cursor.fetchmany(TERMS_FETCH_BATCH_SIZE)
+                if not rows:
+                    break
+                if not columns:
+                    columns = [[] for _ in rows[0]]
+                for column, values in zip(columns, zip(*rows)):
+                    column.extend(values)
+    return columns
+
+
+def clean_column(values: list) -> List[str]:
+    """Strips the values of a column, converting nulls to ''."""
+    return [
+        "" if value is None else str(value).strip()
+        for value in values
+    ]
+
+
+def chunk_term_list(
+    term_list: Union[TermList, List[str], dict, str],
+    chunk_size: int,
+    search_kwargs: dict,
+) -> List[dict]:
+    """Splits `term_list` in chunks of `chunk_size` terms and returns
+    the `perform_searches` arguments of each chunk, to be expanded by
+    dynamic task mapping.
+
+    The groups of the terms fetched from a database are kept in each
+    chunk. At least one chunk is returned, so that the mapped task is
+    not skipped when there are no terms.
     """
-
-    def merge_two(dict1, dict2):
-        merged = {}
-
-        # Combine keys from both dictionaries
-        all_keys = set(dict1) | set(dict2)
-
-        for key in all_keys:
-            value1 = dict1.get(key)
-
-            value2 = dict2.get(key)
-
-
-            if isinstance(value1, dict) and isinstance(value2, dict):
-                # If both values are dictionaries, merge them recursively
-                merged[key] = merge_results(value1, value2)
-            elif isinstance(value1, dict) or isinstance(value2, dict):
-                # If one of the values is a dict, prefer the dict (override with dict)
-                merged[key] = value1 if isinstance(value1, dict) else value2
-            else:
-                # Sum or concatenate the values, treating None or missing keys as 0
-                merged[key] = (value1) + (value2)
-
-        return merged
-
-    # Pre-processing step: Filter out dictionaries where the first key's value is empty
-    filtered_dicts = []
-
-    for d in dicts:
-        if d:  # Ensure the dictionary is not empty
-            first_key = next(iter(d))
-            first_value = d.get(first_key)
-            if first_value:  # Only include if the first key's value is non-empty
-                filtered_dicts.append(d)
-
-    # If no dictionaries remain after filtering, return an empty dictionary
-    if not filtered_dicts:
-        return {}
-
-    # Reduce the list of dictionaries by merging them two at a time
-    return reduce(merge_two, filtered_dicts)
+    term_list = TermList.parse(term_list)
+    chunks = [
+        term_list[i : i + chunk_size].to_dict()
+        for i in range(0, len(term_list), chunk_size)
+    ]
+
+    logging.info("Splitting the terms in %s chunks.", max(len(chunks), 1))
+    return [
+        {**search_kwargs, "term_list": chunk}
+        for chunk in chunks or [term_list.to_dict()]
+    ]
+
+
+def count_results(result) -> Union[int, dict]:
+    """Number of publications in each level of a (possibly nested)
+    search result, e.g. `{group: {term: {department: count}}}`."""
+    if isinstance(result, dict):
+        return {key: count_results(value) for key, value in result.items()}
+    if isinstance(result, list):
+        return len(result)
+    return 0
+
+
+def _total(counts: Union[int, dict]) -> int:
+    if isinstance(counts, dict):
+        return sum(_total(value) for value in counts.values())
+    return counts
+
+
+def summarize_searches(searches: Union[dict, List[dict]]) -> List[dict]:
+    """Small summary of the result of each subsearch of a task,
+    published as the `summary` XCom, so that the branching and the
+    monitoring do not need to read the results."""
+    searches = searches if isinstance(searches, list) else [searches]
+    summaries = []
+    for search in searches:
+        counts = count_results(search["result"])
+        summaries.append(
+            {
+                "header": search["header"],
+                "has_matches": any(search["result"].values()),
+                "num_results": _total(counts),
+                "counts": counts,
+            }
+        )
+    return summaries
 
 
 def result_as_html(specs: DAGConfig) -> bool:
@@ -109,38 +174,48 @@ class DouDigestDagGenerator:
     YAMLS_DIR_LIST = [dag_confs for dag_confs in YAMLS_DIR.split(":")]
     SLACK_CONN_ID = "slack_notify_rodou_dagrun"
     DEFAULT_SCHEDULE = "0 5 * * *"
-
-    parser = YAMLParser
-    searchers: Dict[str, BaseSearcher]
+    HARVEST_ENABLED = os.getenv("RO_DOU__DOU_HARVEST", "false").lower() in (
+        "true",
+        "1",
+    )
+
+    SHARDING_ENABLED = os.getenv("RO_DOU__DAG_SHARDING", "false").lower() in (
+        "true",
+        "1",
+    )
+    STRICT_PARSE = os.getenv("RO_DOU__STRICT_PARSE", "false").lower() in (
+        "true",
+        "1",
+    )
+    PARSE_CACHE_ENABLED = os.getenv("RO_DOU__PARSE_CACHE", "true").lower() in (
+        "true",
+        "1",
+    )
+
+    SCHEDULE_PLAN = os.getenv("RO_DOU__SCHEDULE_PLAN")
+    parser = CachedYAMLParser if PARSE_CACHE_ENABLED else YAMLParser
 
     def __init__(self):
-        self.searchers = {
-            "DOU": DOUSearcher(),
-            "QD": QDSearcher(),
-            "INLABS": INLABSSearcher(),
-        }
-        try:
-            conn = BaseHook.get_connection(self.SLACK_CONN_ID)
-            description = json.loads(conn.description)
-            slack_notifier = SlackNotifier(
-                slack_conn_id=self.SLACK_CONN_ID,
-                text=(
-                    ":bomb:"
-                    "\n`DAG`  {{ ti.dag_id }}"
-                    "\n`State`  {{ ti.state }}"
-                    "\n`Task`  {{ ti.task_id }}"
-                    "\n`Execution`  {{ ti.execution_date }}"
-                    "\n`Log`  {{ ti.log_url }}"
-                ),
-                channel=description["channel"],
-            )
-        except Exception as e:
-            logging.info("Connection to DAG run notifier not configured: %s", str(e))
-            slack_notifier = None
-
-        self.on_failure_callback = slack_notifier
+        self._searchers = None
+        self._schedule_minutes = {}
+        self.on_failure_callback = SlackFailureNotifier(self.SLACK_CONN_ID)
         self.on_retry_callback = None
 
+    @property
+    def searchers(self) -> Dict[str, "BaseSearcher"]:
+        """The searchers of each source, instantiated on first use
+        inside the tasks, as they import the scraping stack."""
+        if self._searchers is None:
+            # pylint: disable=import-outside-toplevel
+            from searchers import DOUSearcher, INLABSSearcher, QDSearcher
+
+            self._searchers = {
+                "DOU": DOUSearcher(),
+                "QD": QDSearcher(),
+                "INLABS": INLABSSearcher(),
+            }
+        return self._searchers
+
     @staticmethod
     def prepare_doc_md(specs: DAGConfig, config_file: str) -> str:
         """Prepares the markdown documentation for a dag.
@@ -196,11 +271,14 @@ class DouDigestDagGenerator:
         minuto de execução baseado no `dag_id`, caso a dag utilize o
         schedule padrão. Aplica uma função de hash na string
         dag_id que retorna valor entre 0 e 60 que define o minuto de
-        execução.
+        execução. As DAGs presentes no `RO_DOU__SCHEDULE_PLAN` usam o
+        minuto planejado por `schedule_spreader.py`.
         """
 
         schedule = default_schedule
-        id_based_minute = self._hash_dag_id(specs.id, 60)
+        id_based_minute = self._schedule_minutes.get(specs.id)
+        if id_based_minute is None:
+            id_based_minute = self._hash_dag_id(specs.id, 60)
         schedule_without_min = " ".join(schedule.split(" ")[1:])
         schedule = f"{id_based_minute} {schedule_without_min}"
 
@@ -231,6 +309,9 @@ class DouDigestDagGenerator:
         """
         schedule = specs.schedule
 
+        if self.HARVEST_ENABLED and uses_harvest(specs):
+            return [Dataset(HARVEST_DATASET)]
+
         if schedule is None:
             schedule = self._get_safe_schedule(
                 specs=specs, default_schedule=self.DEFAULT_SCHEDULE
@@ -248,9 +329,34 @@ class DouDigestDagGenerator:
 
         return schedule
 
-    def generate_dags(self):
-        """Iterates over the YAML files and creates all dags"""
+    def generate_dags(
+        self,
+        shard_index: Optional[int] = None,
+        shard_count: Optional[int] = None,
+        subdirectory: Optional[str] = None,
+        target_globals: Optional[dict] = None,
+        harvest: bool = False,
+    ):
+        """Iterates over the YAML files and creates all dags.
+
+        In sharding mode each stub DAG file calls it with its shard,
+        either `shard_index` of `shard_count` hash partitions or a
+        config `subdirectory`, and its own `target_globals`, so that
+        only the DAGs of that shard are created in the stub file. The
+        harvest DAG is created only by the stub called with `harvest`.
+        """
+        if target_globals is None:
+            target_globals = globals()
 
+        with guard_metadata_access(strict=self.STRICT_PARSE):
+            if harvest:
+                self._generate_harvest_dag(target_globals)
+            else:
+                self._generate_dags(
+                    shard_index, shard_count, subdirectory, target_globals
+                )
+
+    def _list_config_files(self) -> List[str]:
         files_list = []
 
         for directory in self.YAMLS_DIR_LIST:
@@ -259,10 +365,104 @@ class DouDigestDagGenerator:
                     if any(ext in filename for ext in [".yaml", ".yml"]):
                         files_list.extend([os.path.join(dirpath, filename)])
 
-        for filepath in files_list:
-            dag_specs = self.parser(filepath).parse()
+        return sorted(files_list)
+
+    def _generate_dags(
+        self,
+        shard_index: Optional[int],
+        shard_count: Optional[int],
+        subdirectory: Optional[str],
+        target_globals: dict,
+    ):
+        all_files = self._list_config_files()
+        files_list = select_shard(
+            all_files, self.YAMLS_DIR_LIST, shard_index, shard_count, subdirectory
+        )
+
+        parsed = [(self.parser(filepath).parse(), filepath) for filepath in files_list]
+        self._schedule_minutes = load_plan(self.SCHEDULE_PLAN)
+
+        if self.PARSE_CACHE_ENABLED:
+            self.parser.cache.log_stats()
+
+        for dag_specs, filepath in parsed:
             dag_id = dag_specs.id
-            globals()[dag_id] = self.create_dag(dag_specs, filepath)
+            target_globals[dag_id] = self.create_dag(dag_specs, filepath)
+
+        is_sharded = shard_count is not None or subdirectory is not None
+        if self.HARVEST_ENABLED and not is_sharded:
+            target_globals[HARVEST_DAG_ID] = self.create_harvest_dag(
+                [dag_specs for dag_specs, _ in parsed if uses_harvest(dag_specs)]
+            )
+
+    def _generate_harvest_dag(self, target_globals: dict):
+        """Creates the harvest DAG of the sharding mode. It needs the
+        terms of every config, so the files that fail to parse are
+        left out instead of failing the harvest."""
+        if not self.HARVEST_ENABLED:
+            return
+
+        specs_list = []
+        for filepath in self._list_config_files():
+            try:
+                dag_specs = self.parser(filepath).parse()
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Config file %s left out of the harvest.", filepath)
+                continue
+            if uses_harvest(dag_specs):
+                specs_list.append(dag_specs)
+        target_globals[HARVEST_DAG_ID] = self.create_harvest_dag(specs_list)
+
+    def harvest_dou(self, targets: List[dict], **context):
+        """Fetches each distinct DOU query once and stores the raw
+        hits to be consumed by the DAGs triggered by the harvest Dataset.
+        """
+        reference_date = get_trigger_date(context, local_time=True)
+        store = HarvestStore()
+        logging.info("Harvesting %s distinct DOU queries.", len(targets))
+        dou_searcher = self.searchers["DOU"]
+        hits = 0
+        for index, target in enumerate(targets):
+            if index:
+                # the same pace as the searches of `DOUSearcher`, so the
+                # harvest is not throttled by in.gov.br
+                time.sleep(dou_searcher.SCRAPPING_INTERVAL * random() * 2)
+            results = dou_searcher.fetch_term(reference_date=reference_date, **target)
+            store.put(harvest_key(**target), reference_date, results)
+            hits += len(results)
+        logging.info("Harvest finished with %s hits.", hits)
+
+    def create_harvest_dag(self, specs_list: List[DAGConfig]) -> DAG:
+        """Creates the DAG that fetches the union of the DOU terms
+        of all the DAGs in `specs_list` and updates the harvest Dataset.
+        """
+        targets = collect_harvest_targets(specs_list)
+        dag = DAG(
+            HARVEST_DAG_ID,
+            default_args={
+                "owner": "ro-dou",
+                "start_date": datetime(2021, 10, 18),
+                "depends_on_past": False,
+                "retries": 10,
+                "retry_delay": timedelta(minutes=20),
+                "on_retry_callback": self.on_retry_callback,
+                "on_failure_callback": self.on_failure_callback,
+            },
+            schedule=self.DEFAULT_SCHEDULE,
+            description="Busca diária no DOU da união dos termos das DAGs do Ro-DOU",
+            catchup=False,
+            params={"trigger_date": "2022-01-02T12:00"},
+            tags=["dou", "generated_dag", "harvest"],
+        )
+        with dag:
+            PythonOperator(
+                task_id="harvest_dou",
+                python_callable=self.harvest_dou,
+                op_kwargs={"targets": targets},
+                outlets=[Dataset(HARVEST_DATASET)],
+            )
+
+        return dag
 
     def perform_searches(
         self,
@@ -280,14 +480,30 @@ class DouDigestDagGenerator:
         use_summary: Optional[bool],
         result_as_email: Optional[bool],
         department: List[str],
+        use_harvest: Optional[bool] = False,
+        checkpoint_suffix: str = "",
+        store_result: bool = True,
         **context,
     ) -> dict:
-        """Performs the search in each source and merge the results"""
+        """Performs the search in each source and merge the results.
+
+        The sources run concurrently. The result of each source is kept
+        in a checkpoint as soon as it finishes, so that when another
+        source fails the task retry only runs the failed one.
+        """
+        term_list = TermList.parse(term_list)
+        reference_date = get_trigger_date(context, local_time=True)
         logging.info("Searching for: %s", term_list)
-        logging.info("Trigger date: %s", get_trigger_date(context, local_time=True))
+        logging.info("Trigger date: %s", reference_date)
+        checkpoint = SearchCheckpoint.from_context(context, suffix=checkpoint_suffix)
+        finished = SearchCheckpoint.from_context(
+            context, suffix=f"{checkpoint_suffix}__sources"
+        )
 
+        searches = {}
         if "DOU" in sources:
-            dou_result = self.searchers["DOU"].exec_search(
+            searches["DOU"] = partial(
+                self.searchers["DOU"].exec_search,
                 term_list=term_list,
                 dou_sections=dou_sections,
                 search_date=search_date,
@@ -296,10 +512,13 @@ class DouDigestDagGenerator:
                 ignore_signature_match=ignore_signature_match,
                 force_rematch=force_rematch,
                 department=department,
-                reference_date=get_trigger_date(context, local_time=True),
+                reference_date=reference_date,
+                use_harvest=use_harvest,
+                checkpoint=checkpoint,
             )
         elif "INLABS" in sources:
-            inlabs_result = self.searchers["INLABS"].exec_search(
+            searches["INLABS"] = partial(
+                self.searchers["INLABS"].exec_search,
                 terms=term_list,
                 dou_sections=dou_sections,
                 search_date=search_date,
@@ -307,11 +526,12 @@ class DouDigestDagGenerator:
                 ignore_signature_match=ignore_signature_match,
                 full_text=full_text,
                 use_summary=use_summary,
-                reference_date=get_trigger_date(context, local_time=True),
+                reference_date=reference_date,
             )
 
         if "QD" in sources:
-            qd_result = self.searchers["QD"].exec_search(
+            searches["QD"] = partial(
+                self.searchers["QD"].exec_search,
                 territory_id=territory_id,
                 term_list=term_list,
                 dou_sections=dou_sections,
@@ -320,20 +540,23 @@ class DouDigestDagGenerator:
                 is_exact_search=is_exact_search,
                 ignore_signature_match=ignore_signature_match,
                 force_rematch=force_rematch,
-                reference_date=get_trigger_date(context, local_time=True),
+                reference_date=reference_date,
                 result_as_email=result_as_email,
             )
 
-        if "DOU" in sources and "QD" in sources:
-            result = merge_results(qd_result, dou_result)
-        elif "INLABS" in sources and "QD" in sources:
-            result = merge_results(qd_result, inlabs_result)
-        elif "DOU" in sources:
-            result = dou_result
-        elif "INLABS" in sources:
-            result = inlabs_result
+        source_results = self._run_sources(searches, finished)
+
+        if len(source_results) > 1:
+            # QD first, as the results were merged before
+            result = merge_results(
+                *(
+                    source_results[source]
+                    for source in ("QD", "DOU", "INLABS")
+                    if source in source_results
+                )
+            )
         else:
-            result = qd_result
+            result = next(iter(source_results.values()), {})
 
         # Add more specs info
         search_dict = {}
@@ -341,33 +564,190 @@ class DouDigestDagGenerator:
         search_dict["header"] = header
         search_dict["department"] = department
 
+        checkpoint.clear()
+        finished.clear()
+
+        if store_result:
+            return self._publish_result(search_dict, **context)
         return search_dict
 
-    def get_xcom_pull_tasks(self, num_searches, **context):
+    @staticmethod
+    def _run_sources(
+        searches: Dict[str, Callable[[], SearchResult]], finished: SearchCheckpoint
+    ) -> Dict[str, SearchResult]:
+        """Runs the search of each source in its own thread and returns
+        the results by source. The sources finished in a previous try
+        are taken from `finished`, where the new results are also kept.
+        If any source fails, the others still run to the end and the
+        first error is raised afterwards.
+        """
+        results = {}
+        pending = {}
+        for source, search in searches.items():
+            result = finished.get(source)
+            if result is not None:
+                logging.info("Source %s already finished in a previous try.", source)
+                results[source] = result
+            else:
+                pending[source] = search
+
+        def timed(source: str, search: Callable[[], SearchResult]):
+            start = time.perf_counter()
+            try:
+                return search()
+            finally:
+                logging.info(
+                    "Source %s finished in %.1fs.",
+                    source,
+                    time.perf_counter() - start,
+                )
+
+        errors = {}
+        with ThreadPoolExecutor(
+            max_workers=max(len(pending), 1), thread_name_prefix="ro_dou_source"
+        ) as executor:
+            futures = {
+                executor.submit(timed, source, search): source
+                for source, search in pending.items()
+            }
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    results[source] = future.result()
+                except Exception as e:  # pylint: disable=broad-except
+                    logging.error("Source %s failed: %s", source, e)
+                    errors[source] = e
+                    continue
+                finished.put(source, results[source])
+
+        if errors:
+            raise next(iter(errors.values()))
+        return results
+
+    @staticmethod
+    def _publish_result(value: Union[dict, List[dict]], **context):
+        """Publishes the `summary` XCom of a search task and writes its
+        result to the result store, if configured. Returns the value to
+        be kept in the `return_value` XCom: the result itself or its
+        reference."""
+        summary = summarize_searches(value)
+        context["ti"].xcom_push(key="summary", value=summary)
+        logging.info(
+            "Results: %s",
+            ", ".join(
+                f"{search['header']}: {search['num_results']}" for search in summary
+            ),
+        )
+
+        store = ResultStore.from_env()
+        if store is None:
+            return value
+        reference = store.put(value, summary, **context)
+        logging.info("Results stored in %s.", reference["result_store_path"])
+        return reference
+
+    @staticmethod
+    def _resolve_result(value):
+        """Reads the result referenced by an XCom value, if any."""
+        return ResultStore.load(value) if is_reference(value) else value
+
+    def perform_all_searches(self, searches: List[dict], **context) -> List[dict]:
+        """Runs every subsearch of the DAG in a single task, for the
+        `execution: compact` mode, sharing the searchers, their HTTP
+        sessions and the terms fetched from each database query.
+
+        Subsearches already finished are kept in a checkpoint, so that a
+        retry of the task only runs the remaining ones.
+        """
+        finished = SearchCheckpoint.from_context(context, suffix="__subsearches")
+        terms_from_db = {}
+        search_results = []
+
+        for counter, search_kwargs in enumerate(searches, 1):
+            search_kwargs = dict(search_kwargs)
+            search_result = finished.get(str(counter))
+            if search_result is not None:
+                logging.info("Subsearch %s already finished in a previous try.", counter)
+                search_results.append(search_result)
+                continue
+
+            start = time.perf_counter()
+            from_db_select = search_kwargs.pop("from_db_select", None)
+            if from_db_select is not None:
+                db_key = (from_db_select["sql"], from_db_select["conn_id"])
+                if db_key not in terms_from_db:
+                    terms_from_db[db_key] = self.select_terms_from_db(**from_db_select)
+                search_kwargs["term_list"] = terms_from_db[db_key]
+
+            search_result = self.perform_searches(
+                checkpoint_suffix=f"__{counter}",
+                store_result=False,
+                **search_kwargs,
+                **context,
+            )
+            logging.info(
+                "Subsearch %s (%s) finished in %.1fs.",
+                counter,
+                search_kwargs["header"],
+                time.perf_counter() - start,
+            )
+            finished.put(str(counter), search_result)
+            search_results.append(search_result)
+
+        finished.clear()
+        return self._publish_result(search_results, **context)
+
+    def merge_search_chunks(self, chunks: List[dict], **context) -> dict:
+        """Merges the results of the chunks of a subsearch split by
+        `chunk_size` into a single subsearch result."""
+        chunks = [self._resolve_result(chunk) for chunk in chunks]
+        return self._publish_result(
+            {
+                "result": merge_results(*(chunk["result"] for chunk in chunks)),
+                "header": chunks[0]["header"],
+                "department": chunks[0]["department"],
+            },
+            **context,
+        )
+
+    def get_xcom_pull_tasks(self, search_task_ids: List[str], **context):
         """Retrieve XCom values from multiple tasks and append them to a new list.
         Function required for Airflow version 2.10.0 or later
         (https://github.com/apache/airflow/issues/41983).
+
+        Tasks running several subsearches return a list of results,
+        which is flattened in the order of the subsearches.
         """
         search_results = []
-        for counter in range(1, num_searches + 1):
-            search_results.append(context["ti"].xcom_pull(
-                task_ids=f'exec_searchs.exec_search_{counter}'))
+        for task_id in search_task_ids:
+            task_result = self._resolve_result(
+                context["ti"].xcom_pull(task_ids=task_id)
+            )
+            if not isinstance(task_result, list):
+                task_result = [task_result]
+            for search in task_result:
+                if search and isinstance(search.get("result"), dict):
+                    intern_result(search["result"])
+            search_results.extend(task_result)
 
         return search_results
 
 
-    def has_matches(self, num_searches: int, skip_null: bool, **context) -> str:
+    def has_matches(self, search_task_ids: List[str], skip_null: bool, **context) -> str:
         """Check if search has matches and return to skip notification or not"""
 
         if skip_null:
-            search_results = self.get_xcom_pull_tasks(num_searches=num_searches,
-                                                      **context)
-
             skip_notification = True
 
-            for search in search_results:
-                items = ["contains" for k, v in search["result"].items() if v]
-                if items:
+            # branches on the summaries, without reading the results
+            for task_id in search_task_ids:
+                summary = context["ti"].xcom_pull(task_ids=task_id, key="summary")
+                if summary is None:
+                    # tasks run before the summaries were published
+                    summary = summarize_searches(
+                        self._resolve_result(context["ti"].xcom_pull(task_ids=task_id))
+                    )
+                if any(search["has_matches"] for search in summary):
                     skip_notification = False
             return "skip_notification" if skip_notification else "send_notification"
         else:
@@ -379,7 +759,14 @@ class DouDigestDagGenerator:
         must contain the terms to be searched. The second column, which
         is optional, is a classifier that will be used to group and sort
         the email report and the generated CSV.
+
+        The rows are streamed from the database in batches of
+        `TERMS_FETCH_BATCH_SIZE`.
         """
+        # pylint: disable=import-outside-toplevel
+        from airflow.providers.microsoft.mssql.hooks.mssql import MsSqlHook
+        from airflow.providers.postgres.hooks.postgres import PostgresHook
+
         conn_type = BaseHook.get_connection(conn_id).conn_type
         if conn_type == "mssql":
             db_hook = MsSqlHook(conn_id)
@@ -388,26 +775,160 @@ class DouDigestDagGenerator:
         else:
             raise Exception("Tipo de banco de dados não suportado: ", conn_type)
 
-        terms_df = db_hook.get_pandas_df(sql)
+        columns = fetch_columns(db_hook, sql, server_side=conn_type != "mssql")
         # Remove unnecessary spaces and change null for ''
-        terms_df = terms_df.applymap(lambda x: str.strip(x) if pd.notnull(x) else "")
+        columns = [clean_column(column) for column in columns[:2]]
+        term_list = TermList(
+            terms=columns[0] if columns else [],
+            groups=columns[1] if len(columns) > 1 else None,
+        )
+        logging.info("%s terms fetched.", len(term_list))
 
-        return terms_df.to_json(orient="columns")
+        return term_list.to_dict()
 
     def send_notification(self,
-                          num_searches: int,
+                          search_task_ids: List[str],
                           specs: DAGConfig,
                           report_date: str,
                           **context) -> str:
         """Send user notification using class Notifier
         """
-        search_report = self.get_xcom_pull_tasks(num_searches=num_searches,
-                                                    **context)
+        search_report = self.get_xcom_pull_tasks(search_task_ids=search_task_ids,
+                                                 **context)
+
+        # pylint: disable=import-outside-toplevel
+        from notification.notifier import Notifier
 
         notifier = Notifier(specs)
 
         notifier.send_notification(search_report=search_report, report_date=report_date)
 
+    def _subsearch_kwargs(self, specs: DAGConfig, subsearch) -> dict:
+        """Arguments of `perform_searches` for a subsearch, except the
+        `term_list`."""
+        return {
+            "header": subsearch.header,
+            "sources": subsearch.sources,
+            "territory_id": subsearch.territory_id,
+            "dou_sections": subsearch.dou_sections,
+            "search_date": subsearch.date,
+            "field": subsearch.field,
+            "is_exact_search": subsearch.is_exact_search,
+            "ignore_signature_match": subsearch.ignore_signature_match,
+            "force_rematch": subsearch.force_rematch,
+            "full_text": subsearch.full_text,
+            "use_summary": subsearch.use_summary,
+            "department": subsearch.department,
+            "result_as_email": result_as_html(specs),
+            "use_harvest": self.HARVEST_ENABLED and uses_harvest(specs),
+        }
+
+    @staticmethod
+    def _terms_come_from_db(subsearch) -> bool:
+        return bool(
+            isinstance(subsearch.terms, FetchTermsConfig)
+            and getattr(subsearch.terms, "from_db_select", None)
+        )
+
+    def _create_search_tasks(self, specs: DAGConfig) -> List[str]:
+        """Creates one task per subsearch, preceded by the task fetching
+        its terms from a database when needed. Returns the ids of the
+        tasks holding the search results."""
+        search_task_ids = []
+
+        for counter, subsearch in enumerate(specs.search, 1):
+
+            # are terms to be fetched from a database?
+            terms_come_from_db = self._terms_come_from_db(subsearch)
+
+            # determine the terms list
+            term_list = []
+            # is it a directly defined list of terms or is it a
+            # configuration for fetching terms from a data source?
+            if isinstance(subsearch.terms, list):
+                term_list = subsearch.terms
+            elif terms_come_from_db:
+                select_terms_from_db_task = PythonOperator(
+                    task_id=f"select_terms_from_db_{counter}",
+                    python_callable=self.select_terms_from_db,
+                    op_kwargs={
+                        "sql": subsearch.terms.from_db_select.sql,
+                        "conn_id": subsearch.terms.from_db_select.conn_id,
+                    },
+                )
+                term_list = select_terms_from_db_task.output
+
+            # the terms fetched from the database are passed as XComArg,
+            # which also sets the dependency on `select_terms_from_db`
+            if subsearch.chunk_size:
+                exec_search_task = self._create_chunked_search_tasks(
+                    specs, subsearch, counter, term_list
+                )
+            else:
+                exec_search_task = PythonOperator(
+                    task_id=f"exec_search_{counter}",
+                    python_callable=self.perform_searches,
+                    op_kwargs={
+                        "term_list": term_list,
+                        **self._subsearch_kwargs(specs, subsearch),
+                    },
+                )
+            search_task_ids.append(exec_search_task.task_id)
+
+        return search_task_ids
+
+    def _create_chunked_search_tasks(
+        self, specs: DAGConfig, subsearch, counter: int, term_list
+    ):
+        """Creates the tasks of a subsearch with `chunk_size`: one task
+        splitting the terms, the search mapped over the chunks and
+        `exec_search_<counter>` merging their results. Returns the
+        merging task."""
+        chunk_terms_task = PythonOperator(
+            task_id=f"chunk_terms_{counter}",
+            python_callable=chunk_term_list,
+            op_kwargs={
+                "term_list": term_list,
+                "chunk_size": subsearch.chunk_size,
+                "search_kwargs": self._subsearch_kwargs(specs, subsearch),
+            },
+        )
+        exec_chunks_task = PythonOperator.partial(
+            task_id=f"exec_search_{counter}_chunks",
+            python_callable=self.perform_searches,
+        ).expand(op_kwargs=chunk_terms_task.output)
+        merge_chunks_task = PythonOperator(
+            task_id=f"exec_search_{counter}",
+            python_callable=self.merge_search_chunks,
+            op_kwargs={"chunks": exec_chunks_task.output},
+        )
+        return merge_chunks_task
+
+    def _create_compact_search_task(self, specs: DAGConfig) -> List[str]:
+        """Creates a single task running all the subsearches, for the
+        `execution: compact` mode."""
+        searches = []
+        for subsearch in specs.search:
+            search_kwargs = self._subsearch_kwargs(specs, subsearch)
+            if self._terms_come_from_db(subsearch):
+                search_kwargs["term_list"] = []
+                search_kwargs["from_db_select"] = {
+                    "sql": subsearch.terms.from_db_select.sql,
+                    "conn_id": subsearch.terms.from_db_select.conn_id,
+                }
+            elif isinstance(subsearch.terms, list):
+                search_kwargs["term_list"] = subsearch.terms
+            else:
+                search_kwargs["term_list"] = []
+            searches.append(search_kwargs)
+
+        exec_search_task = PythonOperator(
+            task_id="exec_search_all",
+            python_callable=self.perform_all_searches,
+            op_kwargs={"searches": searches},
+        )
+        return [exec_search_task.task_id]
+
     def create_dag(self, specs: DAGConfig, config_file: str) -> DAG:
         """Creates the DAG object and tasks
 
@@ -443,66 +964,16 @@ class DouDigestDagGenerator:
 
             with TaskGroup(group_id="exec_searchs") as tg_exec_searchs:
 
-                searches = specs.search
-
-                for counter, subsearch in enumerate(searches, 1):
-
-                    # are terms to be fetched from a database?
-                    terms_come_from_db: bool = isinstance(
-                        subsearch.terms, FetchTermsConfig
-                    ) and getattr(subsearch.terms, "from_db_select", None)
-
-                    # determine the terms list
-                    term_list = []
-                    # is it a directly defined list of terms or is it a
-                    # configuration for fetching terms from a data source?
-                    if isinstance(subsearch.terms, list):
-                        term_list = subsearch.terms
-                    elif terms_come_from_db:
-                        select_terms_from_db_task = PythonOperator(
-                            task_id=f"select_terms_from_db_{counter}",
-                            python_callable=self.select_terms_from_db,
-                            op_kwargs={
-                                "sql": subsearch.terms.from_db_select.sql,
-                                "conn_id": subsearch.terms.from_db_select.conn_id,
-                            },
-                        )
-                        term_list = (
-                            "{{ ti.xcom_pull(task_ids='exec_searchs.select_terms_from_db_"
-                            + str(counter)
-                            + "') }}"
-                        )
-
-                    exec_search_task = PythonOperator(
-                        task_id=f"exec_search_{counter}",
-                        python_callable=self.perform_searches,
-                        op_kwargs={
-                            "header": subsearch.header,
-                            "sources": subsearch.sources,
-                            "territory_id": subsearch.territory_id,
-                            "term_list": term_list,
-                            "dou_sections": subsearch.dou_sections,
-                            "search_date": subsearch.date,
-                            "field": subsearch.field,
-                            "is_exact_search": subsearch.is_exact_search,
-                            "ignore_signature_match": subsearch.ignore_signature_match,
-                            "force_rematch": subsearch.force_rematch,
-                            "full_text": subsearch.full_text,
-                            "use_summary": subsearch.use_summary,
-                            "department": subsearch.department,
-                            "result_as_email": result_as_html(specs),
-                        },
-                    )
-
-                    if terms_come_from_db:
-                        # pylint: disable=pointless-statement
-                        select_terms_from_db_task >> exec_search_task
+                if specs.execution == "compact":
+                    search_task_ids = self._create_compact_search_task(specs)
+                else:
+                    search_task_ids = self._create_search_tasks(specs)
 
             has_matches_task = BranchPythonOperator(
                 task_id="has_matches",
                 python_callable=self.has_matches,
                 op_kwargs={
-                    "num_searches": len(searches),
+                    "search_task_ids": search_task_ids,
                     "skip_null": specs.report.skip_null,
                 },
             )
@@ -513,7 +984,7 @@ class DouDigestDagGenerator:
                 task_id="send_notification",
                 python_callable=self.send_notification,
                 op_kwargs={
-                    "num_searches": len(searches),
+                    "search_task_ids": search_task_ids,
                     "specs": specs,
                     "report_date": template_ano_mes_dia_trigger_local_time,
                 },
@@ -528,4 +999,7 @@ class DouDigestDagGenerator:
 
 
 # # Run dag generation
-DouDigestDagGenerator().generate_dags()
+# In sharding mode the DAGs are created by the stub files written by
+# `sharding.py` instead.
+if not DouDigestDagGenerator.SHARDING_ENABLED:
+    DouDigestDagGenerator().generate_dags()
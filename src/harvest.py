@@ -0,0 +1,118 @@
+"""Daily DOU harvest shared by all the generated DAGs.
+
+Instead of each DAG querying in.gov.br for its own terms, the harvest
+DAG fetches every distinct (term, sections, field) combination found in
+the YAML configs only once a day and stores the raw hits. The per-config
+DAGs are then triggered through a Dataset and read the stored hits,
+performing only the filtering and notification steps.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import List, Optional
+
+HARVEST_DAG_ID = "ro-dou_dou_harvest"
+HARVEST_DATASET = "ro_dou_dou_harvest"
+
+
+def harvest_key(
+    search_term: str,
+    dou_sections: List[str],
+    search_date: str,
+    field: str,
+    is_exact_search: bool,
+) -> str:
+    """Builds the key identifying a distinct DOU query. Sections are
+    sorted so that the same set written in another order hits the
+    same key.
+    """
+    return json.dumps(
+        [
+            search_term,
+            sorted(dou_sections),
+            search_date,
+            field,
+            bool(is_exact_search),
+        ],
+        ensure_ascii=False,
+    )
+
+
+def collect_harvest_targets(specs_list: list) -> List[dict]:
+    """Returns the union of the DOU queries defined in `specs_list`
+    (a list of `DAGConfig`), without duplicates. Only subsearches with
+    terms directly defined in the YAML are considered, as terms fetched
+    from a database are only known at run time.
+    """
+    targets = {}
+    for specs in specs_list:
+        for subsearch in specs.search:
+            if "DOU" not in subsearch.sources or not isinstance(
+                subsearch.terms, list
+            ):
+                continue
+            for term in subsearch.terms:
+                target = {
+                    "search_term": term,
+                    "dou_sections": subsearch.dou_sections,
+                    "search_date": subsearch.date,
+                    "field": subsearch.field,
+                    "is_exact_search": subsearch.is_exact_search,
+                }
+                targets.setdefault(harvest_key(**target), target)
+
+    return list(targets.values())
+
+
+def uses_harvest(specs) -> bool:
+    """Checks if a DAG can be triggered by the harvest Dataset. Only
+    DAGs using the default schedule and searching the DOU are eligible.
+    """
+    return (
+        specs.schedule is None
+        and specs.dataset is None
+        and any(
+            "DOU" in subsearch.sources and isinstance(subsearch.terms, list)
+            for subsearch in specs.search
+        )
+    )
+
+
+class HarvestStore:
+    """Stores the raw DOU hits of the harvest as JSON files, one folder
+    per reference date and one file per query key.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = base_dir or os.getenv(
+            "RO_DOU__HARVEST_DIR",
+            os.path.join(tempfile.gettempdir(), "ro_dou_harvest"),
+        )
+
+    def _path(self, key: str, reference_date: datetime) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(
+            self.base_dir, reference_date.strftime("%Y-%m-%d"), f"{digest}.json"
+        )
+
+    def get(self, key: str, reference_date: datetime) -> Optional[List[dict]]:
+        """Returns the stored hits or None if the query was not
+        harvested for `reference_date`."""
+        try:
+            with open(self._path(key, reference_date), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, reference_date: datetime, results: List[dict]):
+        """Stores the hits atomically, so that readers never see a
+        partially written file."""
+        path = self._path(key, reference_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
@@ -39,9 +39,19 @@ class DOUHook(BaseHook):
         Section.TODOS.value: "Todas",
     }
 
+    _session = None
+
     def __init__(self, *args, **kwargs):
         pass
 
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session reusing the connections to in.gov.br across the
+        pages, terms and subsearches run by the same process."""
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
+
     def _get_query_str(self, term, field, is_exact_search):
         """
         Adiciona aspas duplas no inicio e no fim de cada termo para o
@@ -57,12 +67,14 @@ class DOUHook(BaseHook):
 
     def _request_page(self, with_retry: bool, payload: dict):
         try:
-            return requests.get(self.IN_API_BASE_URL, params=payload, timeout=10)
+            return self.session.get(self.IN_API_BASE_URL, params=payload, timeout=10)
         except requests.exceptions.ConnectionError:
             if with_retry:
                 logging.info("Sleep for 30 seconds before retry requests.get().")
                 time.sleep(30)
-                return requests.get(self.IN_API_BASE_URL, params=payload, timeout=10)
+                return self.session.get(
+                    self.IN_API_BASE_URL, params=payload, timeout=10
+                )
 
 
     def search_text(
@@ -4,13 +4,15 @@
 import re
 import logging
 from datetime import datetime, timedelta, date
-import unicodedata
+from functools import lru_cache
 import pandas as pd
 import html2text
 
 from airflow.hooks.base import BaseHook
 from airflow.providers.postgres.hooks.postgres import PostgresHook
 
+from utils.normalization import normalize, normalize_term, strip_accents
+
 
 class INLABSHook(BaseHook):
     """A custom Apache Airflow Hook designed for executing searches via
@@ -372,15 +374,9 @@ class INLABSHook(BaseHook):
                 list: A sorted list of unique keys found in the text.
             """
 
-            normalized_text = self._normalize(text)
+            normalized_text = normalize(text)
             matches = [
-                key
-                for key in keys
-                if re.search(
-                    r"\b" + re.escape(self._normalize(key)) + r"\b",
-                    normalized_text,
-                    re.IGNORECASE,
-                )
+                key for key in keys if _term_pattern(key).search(normalized_text)
             ]
 
             return ", ".join(sorted(set(matches)))
@@ -397,14 +393,7 @@ class INLABSHook(BaseHook):
                 str: The normalized ASCII string.
             """
 
-            return (
-                unicodedata.normalize("NFKD", text)
-                .encode("ascii", "ignore")
-                .decode("ascii")
-                .lower()
-                if isinstance(text, str)
-                else ""
-            )
+            return strip_accents(text)
 
         @staticmethod
         def _highlight_terms(terms: list, text: str) -> str:
@@ -462,3 +451,9 @@ class INLABSHook(BaseHook):
                 .apply(lambda x: x[cols].apply(lambda y: y.to_dict(), axis=1).tolist())
                 .to_dict()
             )
+
+
+@lru_cache(maxsize=65536)
+def _term_pattern(term: str) -> re.Pattern:
+    """Compiled whole word pattern of the normalized `term`."""
+    return re.compile(r"\b" + re.escape(normalize_term(term)) + r"\b", re.IGNORECASE)
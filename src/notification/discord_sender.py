@@ -59,7 +59,7 @@ class DiscordSender(ISender):
                 "embeds": [
                     {
                         "title": item["title"],
-                        "description": item["abstract"],
+                        "description": self.highlight(item["abstract"]),
                         "url": item["href"],
                     }
                     for item in items
@@ -1,13 +1,16 @@
 """Module for sending emails.
 """
 
+import csv
+import gzip
+import html
+import io
 import os
 import sys
+import zipfile
+from functools import lru_cache
 from tempfile import NamedTemporaryFile
-import textwrap
-
-import markdown
-import pandas as pd
+from typing import BinaryIO, Iterator, List
 from airflow.utils.email import send_email
 
 # TODO fix this
@@ -18,6 +21,45 @@ sys.path.insert(0, parent_dir)
 
 from notification.isender import ISender
 from schemas import ReportConfig
+from utils.search_result import iter_hits
+
+CSV_COLUMNS = [
+    "Consulta",
+    "Grupo",
+    "Termo de pesquisa",
+    "Unidade",
+    "Seção",
+    "URL",
+    "Título",
+    "Resumo",
+    "Data",
+]
+CSV_SUFFIXES = {None: ".csv", "gzip": ".csv.gz", "zip": ".zip"}
+
+FILTERS_HTML = '<p class="secao-marker">Filtrando resultados somente para:</p>\n'
+RESULT_HTML = (
+    '<p class="secao-marker">{section}</p>\n'
+    '<h3><a href="{href}">{title}</a></h3>\n'
+    "<p style='text-align:justify' class='abstract-marker'>{abstract}</p>\n"
+    "<p class='date-marker'>{date}</p>\n"
+)
+RESULT_HTML_NO_FILTERS = (
+    '<h3><a href="{href}">{title}</a></h3>\n'
+    "<p style='text-align:justify' class='abstract-marker'>{abstract}</p>\n"
+    "<br><br>\n"
+)
+
+
+@lru_cache(maxsize=1)
+def read_report_style() -> str:
+    """The CSS of the email reports, read once per process."""
+    file_path = os.path.join(parent_dir, "report_style.css")
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _escape(value, quote: bool = False) -> str:
+    return html.escape(str(value), quote=quote)
 
 
 class EmailSender(ISender):
@@ -75,145 +117,156 @@ class EmailSender(ISender):
         """Generate HTML content to be sent by email based on
         search_report dictionary
         """
+        config = self.report_config
+        show_filters = not config.hide_filters
+        template = RESULT_HTML if show_filters else RESULT_HTML_NO_FILTERS
+        parts = [f"<style>\n{read_report_style()}</style>\n"]
+        append = parts.append
 
-        current_directory = os.path.dirname(__file__)
-        parent_directory = os.path.dirname(current_directory)
-        file_path = os.path.join(parent_directory, "report_style.css")
-
-        with open(file_path, "r", encoding="utf-8") as f:
-            blocks = [f"<style>\n{f.read()}</style>"]
-
-        if self.report_config.header_text:
-            blocks.append(self.report_config.header_text)
+        if config.header_text:
+            append(f"{config.header_text}\n")
 
         for search in self.search_report:
-
             if search["header"]:
-                blocks.append(f"<h1>{search['header']}</h1>")
-
-            if not self.report_config.hide_filters:
-                if search["department"]:
-                    blocks.append(
-                        """<p class="secao-marker">Filtrando resultados somente para:</p>"""
-                    )
-                    blocks.append("<ul>")
-                    for dpt in search["department"]:
-                        blocks.append(f"<li>{dpt}</li>")
-                    blocks.append("</ul>")
+                append(f"<h1>{search['header']}</h1>\n")
 
-            for group, search_results in search["result"].items():
+            if show_filters and search["department"]:
+                append(FILTERS_HTML)
+                append("<ul>\n")
+                for dpt in search["department"]:
+                    append(f"<li>{_escape(dpt)}</li>\n")
+                append("</ul>\n")
 
+            for group, search_results in search["result"].items():
                 if not search_results:
-                    blocks.append(f"<p>{self.report_config.no_results_found_text}.</p>")
-                else:
-                    if not self.report_config.hide_filters:
-                        if group != "single_group":
-                            blocks.append("\n")
-                            blocks.append(f"**Grupo: {group}**")
-                            blocks.append("\n\n")
-
-                    for term, term_results in search_results.items():
-                        blocks.append("\n")
-                        if not self.report_config.hide_filters:
-                            blocks.append(f"* # Resultados para: {term}")
-
-                        for department, results in term_results.items():
-
-                            if (
-                                not self.report_config.hide_filters
-                                and department != "single_department"
-                            ):
-                                blocks.append(f"**{department}**")
-
-                            for result in results:
-                                if not self.report_config.hide_filters:
-                                    sec_desc = result["section"]
-                                    item_html = f"""
-                                        <p class="secao-marker">{sec_desc}</p>
-                                        ### [{result['title']}]({result['href']})
-                                        <p style='text-align:justify' class='abstract-marker'>{result['abstract']}</p>
-                                        <p class='date-marker'>{result['date']}</p>"""
-                                    blocks.append(
-                                        textwrap.indent(
-                                            textwrap.dedent(item_html), " " * 4
-                                        )
-                                    )
-                                else:
-                                    item_html = f"""
-                                        ### [{result['title']}]({result['href']})
-                                        <p style='text-align:justify' class='abstract-marker'>{result['abstract']}</p><br><br>"""
-                                    blocks.append(textwrap.dedent(item_html))
-
-        blocks.append("---")
-        if self.report_config.footer_text:
-            blocks.append(self.report_config.footer_text)
-
-        return markdown.markdown("\n".join(blocks))
+                    append(f"<p>{config.no_results_found_text}.</p>\n")
+                    continue
+
+                if show_filters:
+                    if group != "single_group":
+                        append(f"<p><strong>Grupo: {_escape(group)}</strong></p>\n")
+                    append("<ul>\n")
+
+                for term, term_results in search_results.items():
+                    if show_filters:
+                        append(f"<li>\n<h1>Resultados para: {_escape(term)}</h1>\n")
+
+                    for department, results in term_results.items():
+                        if show_filters and department != "single_department":
+                            append(f"<p><strong>{_escape(department)}</strong></p>\n")
+
+                        for result in results:
+                            append(
+                                template.format(
+                                    section=_escape(result["section"]),
+                                    href=_escape(result["href"], quote=True),
+                                    title=_escape(result["title"]),
+                                    abstract=self.highlight(result["abstract"]),
+                                    date=_escape(result["date"]),
+                                )
+                            )
+
+                    if show_filters:
+                        append("</li>\n")
+
+                if show_filters:
+                    append("</ul>\n")
+
+        append("<hr />\n")
+        if config.footer_text:
+            append(f"{config.footer_text}\n")
+
+        return "".join(parts)
 
     def get_csv_tempfile(self) -> NamedTemporaryFile:
-        temp_file = NamedTemporaryFile(prefix="extracao_dou_", suffix=".csv")
-        self.convert_report_to_dataframe().to_csv(temp_file, index=False)
+        """Writes the report rows as CSV to a temporary file, compressed
+        with gzip or zip if `csv_compression` is set, one row at a
+        time."""
+        compression = self.report_config.csv_compression
+        temp_file = NamedTemporaryFile(
+            prefix="extracao_dou_", suffix=CSV_SUFFIXES[compression]
+        )
+        if compression == "gzip":
+            with gzip.GzipFile(
+                filename="extracao_dou.csv", fileobj=temp_file, mode="wb"
+            ) as gzip_file:
+                self.write_csv(gzip_file)
+        elif compression == "zip":
+            with zipfile.ZipFile(temp_file, "w", zipfile.ZIP_DEFLATED) as zip_file:
+                with zip_file.open("extracao_dou.csv", "w") as csv_entry:
+                    self.write_csv(csv_entry)
+        else:
+            self.write_csv(temp_file)
+        temp_file.flush()
         return temp_file
 
-    def convert_report_to_dataframe(self) -> pd.DataFrame:
-        df = pd.DataFrame(self.convert_report_dict_to_tuple_list())
-        df.columns = [
-            "Consulta",
-            "Grupo",
-            "Termo de pesquisa",
-            "Unidade",
-            "Seção",
-            "URL",
-            "Título",
-            "Resumo",
-            "Data",
-        ]
-        del_header = True
-        del_single_group = True
-        del_single_department = True
-
+    def write_csv(self, binary_file: BinaryIO):
+        """Writes the CSV of the report to `binary_file`."""
+        columns = self._csv_columns()
+        text_file = io.TextIOWrapper(binary_file, encoding="utf-8", newline="")
+        try:
+            writer = csv.writer(text_file, lineterminator="\n")
+            writer.writerow([CSV_COLUMNS[i] for i in columns])
+            writer.writerows(
+                [row[i] for i in columns] for row in self._iter_csv_rows()
+            )
+        finally:
+            # leaves `binary_file` open for the caller
+            text_file.flush()
+            text_file.detach()
+
+    def _csv_columns(self) -> List[int]:
+        """Indexes of the `CSV_COLUMNS` to be written: the header, group
+        and department columns are dropped when no search uses them."""
+        has_header = False
+        has_group = False
+        has_department = False
         for search in self.search_report:
             if search["header"] is not None:
-                del_header = False
+                has_header = True
 
             for group, search_result in search["result"].items():
                 if group != "single_group":
-                    del_single_group = False
-                for _, term_results in search_result.items():
-                    for dpt,_ in term_results.items():
-                        if dpt != "single_department":
-                            del_single_department = False
-
-        # Drop empty or default columns
-        if del_header:
-            del df["Consulta"]
-
-        if del_single_group:
-            del df["Grupo"]
-        else:
-            # Replace single_group with blank
-            df["Grupo"] = df["Grupo"].replace("single_group", "")
-
-        if del_single_department:
-            del df["Unidade"]
-        else:
-            # Replace single_group with blank
-            df["Unidade"] = df["Unidade"].replace("single_department", "")
-
-        return df
+                    has_group = True
+                for term_results in search_result.values():
+                    if any(dpt != "single_department" for dpt in term_results):
+                        has_department = True
+
+        dropped = set()
+        if not has_header:
+            dropped.add(CSV_COLUMNS.index("Consulta"))
+        if not has_group:
+            dropped.add(CSV_COLUMNS.index("Grupo"))
+        if not has_department:
+            dropped.add(CSV_COLUMNS.index("Unidade"))
+        return [i for i in range(len(CSV_COLUMNS)) if i not in dropped]
+
+    def _iter_csv_rows(self) -> Iterator[tuple]:
+        for row in self._iter_report_tuples():
+            header, group, term, department, *match_values = row
+            # Replace single_group and single_department with blank
+            yield (
+                "" if header is None else header,
+                "" if group == "single_group" else group,
+                term,
+                "" if department == "single_department" else department,
+                *match_values,
+            )
 
     def convert_report_dict_to_tuple_list(self) -> list:
-        tuple_list = []
-        for search in self.search_report:
-            header = search["header"] if search["header"] else None
-            for group, results in search["result"].items():
-                for term, departments in results.items():
-                    for department, dpt_matches in departments.items():
-                        for match in dpt_matches:
-                            tuple_list.append(
-                                repack_match(header, group, term, department, match)
-                            )
-        return tuple_list
+        return list(self._iter_report_tuples())
+
+    def _iter_report_tuples(self) -> Iterator[tuple]:
+        for hit in iter_hits(self.search_report):
+            *row, abstract, date = repack_match(
+                hit.header,
+                hit.group,
+                # all the terms of a deduplicated publication
+                ", ".join(hit.match.get("matched_terms") or [hit.term]),
+                hit.department,
+                hit.match,
+            )
+            yield (*row, self.highlight(abstract), date)
 
 
 def repack_match(
@@ -0,0 +1,50 @@
+"""Slack notification of failed tasks.
+
+The Slack connection is looked up only when a task fails, instead of on
+every parse of the DAG files, so that the scheduler does not query the
+metadata database or the secrets backend while building the DAGs.
+"""
+
+import json
+import logging
+
+from airflow.hooks.base import BaseHook
+
+FAILURE_MESSAGE = (
+    ":bomb:"
+    "\n`DAG`  {{ ti.dag_id }}"
+    "\n`State`  {{ ti.state }}"
+    "\n`Task`  {{ ti.task_id }}"
+    "\n`Execution`  {{ ti.execution_date }}"
+    "\n`Log`  {{ ti.log_url }}"
+)
+
+
+class SlackFailureNotifier:
+    """Task callback that sends the failure to the Slack channel set in
+    the description of the `slack_conn_id` connection. Does nothing if
+    the connection is not configured.
+
+    Args:
+        slack_conn_id (str): The Slack connection id.
+    """
+
+    def __init__(self, slack_conn_id: str):
+        self.slack_conn_id = slack_conn_id
+
+    def __call__(self, context: dict):
+        try:
+            conn = BaseHook.get_connection(self.slack_conn_id)
+            description = json.loads(conn.description)
+        except Exception as e:
+            logging.info("Connection to DAG run notifier not configured: %s", str(e))
+            return
+
+        # pylint: disable=import-outside-toplevel
+        from airflow.providers.slack.notifications.slack import SlackNotifier
+
+        SlackNotifier(
+            slack_conn_id=self.slack_conn_id,
+            text=FAILURE_MESSAGE,
+            channel=description["channel"],
+        )(context)
@@ -1,4 +1,3 @@
-import copy
 import re
 from abc import ABC, abstractmethod
 
@@ -21,42 +20,34 @@ class ISender(ABC):
 
 
     def send_report(self, search_report: list, report_date: str=None):
-        """Send a notification with the search report, after highlighting the abstracts.
+        """Send a notification with the search report. The abstracts keep
+        their `<%%>` placeholders in the report, shared by all the
+        senders, and each sender highlights them with `highlight` while
+        rendering.
 
         Args:
             search_report (list): A list containing the search results.
             report_date (str, optional): The date of the search report. Defaults to None.
         """
-        highlighted_reports = []
-        for report in search_report:
-            highlighted_reports.append(self._highlighted_reports(report))
+        self.send(search_report, report_date)
 
-        self.send(highlighted_reports, report_date)
 
-
-    def _highlighted_reports(self, search_report: dict) -> dict:
-        """Replace placeholders with specific formatting depending on
-        the sender type.
+    def highlight(self, abstract: str) -> str:
+        """Replace the placeholders of an abstract with the formatting
+        tags of the sender type.
 
         Args:
-            search_report (dict): A dictionary containing the search results.
+            abstract (str): An abstract of the search results.
 
         Returns:
-            dict: A dictionary with the placeholders replaced with formatting tags.
+            str: The abstract with the placeholders replaced with formatting tags.
         """
-        reports = copy.deepcopy(search_report)
-        for _, results in reports["result"].items():
-            for _,dpt in results.items():
-                for _, items in dpt.items():
-                    for item in items:
-                        open_tag, close_tag = self.highlight_tags
-                        item['abstract'] = _fix_missing_spaces(item['abstract']) \
-                            .replace('<%%>', open_tag) \
-                            .replace('</%%>', close_tag)
-
-        print (reports)
-
-        return reports
+        if "%%>" not in abstract:
+            return abstract
+        open_tag, close_tag = self.highlight_tags
+        return _fix_missing_spaces(abstract) \
+            .replace('<%%>', open_tag) \
+            .replace('</%%>', close_tag)
 
 
 def _fix_missing_spaces(string: str) -> str:
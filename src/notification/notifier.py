@@ -15,6 +15,7 @@ from notification.email_sender import EmailSender
 from notification.isender import ISender
 from notification.slack_sender import SlackSender
 from parsers import DAGConfig
+from utils.search_result import deduplicate_report
 
 
 class Notifier:
@@ -25,6 +26,7 @@ class Notifier:
     senders = List[ISender]
 
     def __init__(self, specs: DAGConfig) -> None:
+        self.deduplicate = specs.report.deduplicate
         self.senders = []
         if specs.report.emails:
             self.senders.append(EmailSender(specs.report))
@@ -42,5 +44,8 @@ class Notifier:
             report_date (str): The date of the report
         """
 
+        if self.deduplicate:
+            search_report = deduplicate_report(search_report)
+
         for sender in self.senders:
             sender.send_report(search_report, report_date)
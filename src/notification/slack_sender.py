@@ -79,7 +79,10 @@ class SlackSender(ISender):
     def _add_block(self, item):
         self.blocks += [
             {"type": "section", "text": {"type": "mrkdwn", "text": item["title"]}},
-            {"type": "section", "text": {"type": "mrkdwn", "text": item["abstract"]}},
+            {
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": self.highlight(item["abstract"])},
+            },
             {
                 "type": "section",
                 "text": {
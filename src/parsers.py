@@ -1,5 +1,6 @@
 """Abstract and concrete classes to parse DAG configuration from a file."""
 
+import hashlib
 import json
 import textwrap
 import os
@@ -12,7 +13,12 @@ from airflow import Dataset
 from airflow.models import Variable
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+import schemas
 from schemas import RoDouConfig, DAGConfig
+from utils.disk_cache import DiskCache
+
+# the libyaml loader is several times faster than the pure Python one
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 class YAMLParser:
@@ -28,7 +34,7 @@ class YAMLParser:
     def read(self) -> dict:
         """Reads the contents of the YAML file."""
         with open(self.filepath, "r", encoding="utf-8") as file:
-            dag_config_dict = yaml.safe_load(file)
+            dag_config_dict = yaml.load(file, Loader=YAML_LOADER)
         return dag_config_dict
 
     def parse(self) -> DAGConfig:
@@ -157,3 +163,42 @@ class YAMLParser:
             file_name = self.filepath.split("/")[-1]
             error_msg = f"Erro no arquivo {file_name}: {error_msg}"
             raise ValueError(error_msg)
+
+
+def _file_digest(filepath: str) -> str:
+    with open(filepath, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class CachedYAMLParser(YAMLParser):
+    """YAMLParser that keeps the validated `DAGConfig` in a disk cache,
+    so that unchanged files skip the YAML parsing and the pydantic
+    validation on every scheduler parse loop.
+
+    The cache key combines the file path, its mtime and the hash of its
+    content, plus the hash of the `schemas` module, so that changes on
+    the models also invalidate the cached configs.
+    """
+
+    cache = DiskCache("dag_configs", max_entries=20000)
+    _schemas_digest = None
+
+    def _cache_key(self) -> str:
+        if CachedYAMLParser._schemas_digest is None:
+            CachedYAMLParser._schemas_digest = _file_digest(schemas.__file__)
+        return json.dumps(
+            [
+                os.path.abspath(self.filepath),
+                os.stat(self.filepath).st_mtime_ns,
+                _file_digest(self.filepath),
+                CachedYAMLParser._schemas_digest,
+            ]
+        )
+
+    def parse(self) -> DAGConfig:
+        cache_key = self._cache_key()
+        dag_config = self.cache.get(cache_key)
+        if dag_config is None:
+            dag_config = super().parse()
+            self.cache.set(cache_key, dag_config)
+        return dag_config
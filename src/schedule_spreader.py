@@ -0,0 +1,294 @@
+"""Distribution of the DAGs with the default schedule along the hour.
+
+The DAGs without `schedule` in the YAML run at a minute of the hour of
+`DEFAULT_SCHEDULE` derived from their id. The minutes can instead be
+chosen by `ScheduleSpreader`, which starts from a well-distributed hash
+of the DAG id and moves the DAG to the next minutes while any of its
+sources (DOU, QD, INLABS) already has `budget` DAGs running in the
+minute. The DAGs that usually run for several minutes, according to the
+runtimes measured in previous runs, occupy the following minutes too.
+
+The minutes are planned offline, as they depend on every config file,
+and written to the JSON file `RO_DOU__SCHEDULE_PLAN` read by the
+generator. The runtimes file `RO_DOU__SCHEDULE_RUNTIMES`, mapping each
+DAG id to its duration in seconds, is written from the Airflow metadata
+database:
+
+    python schedule_spreader.py runtimes <runtimes.json> [--runs N]
+    python schedule_spreader.py plan <plan.json> <dag_confs_dir> [<dir> ...]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import math
+import os
+import statistics
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import yaml
+
+SLOTS = 60
+DEFAULT_BUDGET_KEY = "*"
+# the libyaml loader is several times faster than the pure Python one
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class ScheduledDag(NamedTuple):
+    """A DAG to be placed by the spreader."""
+
+    dag_id: str
+    sources: List[str]
+
+
+def stable_hash(dag_id: str) -> int:
+    """Hash of the DAG id, stable between processes and well
+    distributed even for ids differing only in a few characters."""
+    return int(hashlib.sha1(dag_id.encode("utf-8")).hexdigest(), 16)
+
+
+def parse_budgets(value: Optional[str]) -> Dict[str, int]:
+    """Parses the budget setting, either a single number of DAGs per
+    minute for every source (`2`) or a number per source, with an
+    optional default (`DOU=2,QD=4,*=3`)."""
+    budgets = {DEFAULT_BUDGET_KEY: 1}
+    if not value:
+        return budgets
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        source, _, budget = item.rpartition("=")
+        budgets[source.strip() or DEFAULT_BUDGET_KEY] = int(budget)
+    if any(budget < 1 for budget in budgets.values()):
+        raise ValueError("O orçamento de DAGs por minuto deve ser maior que 0.")
+    return budgets
+
+
+def _load_mapping(path: Optional[str]) -> dict:
+    if not path:
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning("File %s not loaded: %s", path, e)
+        return {}
+
+
+def load_runtimes(path: Optional[str]) -> Dict[str, float]:
+    """Reads the runtimes file, returning no runtimes if it is not set
+    or cannot be read."""
+    return {
+        dag_id: float(seconds)
+        for dag_id, seconds in _load_mapping(path).items()
+        if isinstance(seconds, (int, float))
+    }
+
+
+def load_plan(path: Optional[str]) -> Dict[str, int]:
+    """Reads the minute of each DAG from the plan file, returning no
+    minutes if it is not set or cannot be read."""
+    return {
+        dag_id: minute % SLOTS
+        for dag_id, minute in _load_mapping(path).items()
+        if isinstance(minute, int)
+    }
+
+
+def read_scheduled_dag(
+    filepath: str, harvest_enabled: bool = False
+) -> Optional[ScheduledDag]:
+    """Reads the DAG id and the sources of a config file from the plain
+    YAML, without validating it. Returns None for the DAGs not using the
+    default schedule: with `schedule` or `dataset`, or triggered by the
+    DOU harvest when `harvest_enabled`."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        dag = yaml.load(f, Loader=YAML_LOADER)["dag"]
+    if dag.get("schedule") is not None or dag.get("dataset") is not None:
+        return None
+    searches = dag["search"] if isinstance(dag["search"], list) else [dag["search"]]
+    sources = [search.get("sources") or ["DOU"] for search in searches]
+    if harvest_enabled and any(
+        "DOU" in search_sources and isinstance(search.get("terms"), list)
+        for search, search_sources in zip(searches, sources)
+    ):
+        return None
+    return ScheduledDag(
+        dag["id"],
+        sorted({source for search_sources in sources for source in search_sources}),
+    )
+
+
+class ScheduleSpreader:
+    """Assigns a minute of the hour to each DAG.
+
+    Args:
+        budgets (dict): Number of DAGs of each source allowed to run in
+            the same minute, with the default under `*`.
+        runtimes (dict, optional): Measured duration in seconds of each
+            DAG. DAGs without runtime occupy a single minute.
+    """
+
+    def __init__(
+        self, budgets: Dict[str, int], runtimes: Optional[Dict[str, float]] = None
+    ):
+        self.budgets = budgets
+        self.runtimes = runtimes or {}
+
+    def _budget(self, source: str) -> int:
+        return self.budgets.get(source, self.budgets[DEFAULT_BUDGET_KEY])
+
+    def _duration(self, dag_id: str) -> int:
+        """Number of minutes occupied by the DAG."""
+        seconds = self.runtimes.get(dag_id, 0)
+        return min(SLOTS, max(1, math.ceil(seconds / 60)))
+
+    def assign(self, dags: Iterable[ScheduledDag]) -> Dict[str, int]:
+        """Returns the minute of each DAG.
+
+        The longest DAGs are placed first and the others in the order of
+        their hash, so the result depends only on the set of DAGs and
+        not on the order of the config files. When no minute fits the
+        budget of a DAG, it goes to the least loaded minute.
+        """
+        load = {}  # (source, minute) -> number of DAGs running
+        minutes = {}
+        dags = sorted(
+            dags,
+            key=lambda dag: (
+                -self._duration(dag.dag_id),
+                stable_hash(dag.dag_id),
+                dag.dag_id,
+            ),
+        )
+        for dag in dags:
+            sources = dag.sources or [DEFAULT_BUDGET_KEY]
+            duration = self._duration(dag.dag_id)
+            preferred = stable_hash(dag.dag_id) % SLOTS
+            candidates = [(preferred + shift) % SLOTS for shift in range(SLOTS)]
+
+            def usage(start: int) -> float:
+                """Highest share of the budget of the DAG sources in
+                use in the minutes the DAG would run."""
+                return max(
+                    load.get((source, (start + offset) % SLOTS), 0)
+                    / self._budget(source)
+                    for source in sources
+                    for offset in range(duration)
+                )
+
+            minute = next(
+                (start for start in candidates if usage(start) < 1),
+                None,
+            )
+            if minute is None:
+                minute = min(candidates, key=usage)
+
+            for source in sources:
+                for offset in range(duration):
+                    key = (source, (minute + offset) % SLOTS)
+                    load[key] = load.get(key, 0) + 1
+            minutes[dag.dag_id] = minute
+        return minutes
+
+
+def collect_runtimes(num_runs: int = 5) -> Dict[str, float]:
+    """Median duration in seconds of the last `num_runs` successful
+    runs of each DAG, read from the Airflow metadata database."""
+    # pylint: disable=import-outside-toplevel
+    from airflow.models import DagRun
+    from airflow.utils.session import create_session
+    from airflow.utils.state import DagRunState
+
+    durations = {}
+    with create_session() as session:
+        runs = (
+            session.query(DagRun.dag_id, DagRun.start_date, DagRun.end_date)
+            .filter(
+                DagRun.state == DagRunState.SUCCESS,
+                DagRun.start_date.isnot(None),
+                DagRun.end_date.isnot(None),
+            )
+            .order_by(DagRun.dag_id, DagRun.start_date.desc())
+        )
+        for dag_id, start_date, end_date in runs:
+            dag_durations = durations.setdefault(dag_id, [])
+            if len(dag_durations) < num_runs:
+                dag_durations.append((end_date - start_date).total_seconds())
+    return {
+        dag_id: statistics.median(dag_durations)
+        for dag_id, dag_durations in durations.items()
+    }
+
+
+def plan_schedules(
+    filepaths: Iterable[str],
+    budgets: Dict[str, int],
+    runtimes: Optional[Dict[str, float]] = None,
+    harvest_enabled: bool = False,
+) -> Dict[str, int]:
+    """Plans the minute of the DAGs of `filepaths` with the default
+    schedule. The files that cannot be read are left out of the plan,
+    and their DAGs keep the minute derived from their id."""
+    dags = []
+    for filepath in filepaths:
+        try:
+            dag = read_scheduled_dag(filepath, harvest_enabled)
+        except Exception as e:  # pylint: disable=broad-except
+            logging.warning("Config file %s left out of the plan: %s", filepath, e)
+            continue
+        if dag is not None:
+            dags.append(dag)
+    return ScheduleSpreader(budgets, runtimes).assign(dags)
+
+
+def _write_json(path: str, content: dict):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(content, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Writes the files used to spread the Ro-DOU DAGs."
+    )
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+    runtimes_parser = subparsers.add_parser(
+        "runtimes", help="runtimes of the DAGs, from the Airflow database"
+    )
+    runtimes_parser.add_argument("runtimes_file")
+    runtimes_parser.add_argument("--runs", type=int, default=5)
+    plan_parser = subparsers.add_parser(
+        "plan",
+        help="minute of each DAG, by RO_DOU__SCHEDULE_SLOT_BUDGET and "
+        "RO_DOU__SCHEDULE_RUNTIMES",
+    )
+    plan_parser.add_argument("plan_file")
+    plan_parser.add_argument("directories", nargs="+")
+    args = arg_parser.parse_args()
+
+    if args.command == "runtimes":
+        collected = collect_runtimes(args.runs)
+        _write_json(args.runtimes_file, collected)
+        print(f"{len(collected)} DAG runtimes written to {args.runtimes_file}")
+    else:
+        planned = plan_schedules(
+            sorted(
+                filepath
+                for directory in args.directories
+                for pattern in ("**/*.yaml", "**/*.yml")
+                for filepath in glob.glob(
+                    os.path.join(directory, pattern), recursive=True
+                )
+            ),
+            budgets=parse_budgets(os.getenv("RO_DOU__SCHEDULE_SLOT_BUDGET")),
+            runtimes=load_runtimes(os.getenv("RO_DOU__SCHEDULE_RUNTIMES")),
+            harvest_enabled=os.getenv("RO_DOU__DOU_HARVEST", "false").lower()
+            in ("true", "1"),
+        )
+        _write_json(args.plan_file, planned)
+        print(f"{len(planned)} DAG minutes written to {args.plan_file}")
@@ -15,7 +15,7 @@ library.
 """
 
 import textwrap
-from typing import List, Optional, Set, Union
+from typing import List, Literal, Optional, Set, Union
 from pydantic import AnyHttpUrl, BaseModel, EmailStr, Field
 from pydantic import field_validator
 
@@ -60,10 +60,11 @@ class SearchConfig(BaseModel):
         description="Lista de fontes de dados para pesquisar (Querido Diário [QD], "
         "Diário Oficial da União [DOU], INLABS). Default: DOU.",
     )
-    territory_id: Optional[int] = Field(
+    territory_id: Optional[Union[int, List[int], str]] = Field(
         default=None,
         description="ID do território no Querido Diário para filtragem "
-        "baseada em localização",
+        "baseada em localização. Aceita também uma lista de IDs ou o nome "
+        "de uma variável do Airflow com a lista de IDs (grupo de territórios)",
     )
     date: Optional[str] = Field(
         default="DIA",
@@ -135,6 +136,13 @@ class SearchConfig(BaseModel):
         "Valores: True ou False. Default: False. "
         "(Funcionalidade disponível apenas no INLABS)",
     )
+    chunk_size: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Divide a lista de termos em partes com esta quantidade "
+        "de termos, pesquisadas em paralelo em tarefas separadas. "
+        "Default: sem divisão.",
+    )
 
 
 class ReportConfig(BaseModel):
@@ -177,6 +185,16 @@ class ReportConfig(BaseModel):
         default="Nenhum dos termos pesquisados foi encontrado nesta consulta",
         description="Texto a ser exibido quando não há resultados",
     )
+    csv_compression: Optional[Literal["gzip", "zip"]] = Field(
+        default=None,
+        description="Compressão do arquivo CSV anexado: gzip ou zip. "
+        "Default: sem compressão.",
+    )
+    deduplicate: Optional[bool] = Field(
+        default=False,
+        description="Se deve exibir uma única vez, em cada pesquisa, as "
+        "publicações encontradas por mais de um termo ou fonte. Default: False.",
+    )
 
 
 class DAGConfig(BaseModel):
@@ -197,6 +215,11 @@ class DAGConfig(BaseModel):
         description="Seção para definição da busca no Diário"
     )
     doc_md: Optional[str] = Field(default=None, description="description")
+    execution: Literal["tasks", "compact"] = Field(
+        default="tasks",
+        description="Modo de execução das buscas: `tasks` executa cada busca "
+        "em uma tarefa e `compact` executa todas as buscas em uma única tarefa",
+    )
     report: ReportConfig = Field(
         description="Aceita: `slack`, `discord`, `emails`, `attach_csv`, "
         "`subject`, `skip_null`"
@@ -1,7 +1,6 @@
 """Abstract and concrete classes to perform terms searchs.
 """
 
-import ast
 import json
 import logging
 import re
@@ -9,18 +8,26 @@ import time
 import sys
 import os
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from random import random
-from typing import Dict, List, Tuple, Union
-import string
-import pandas as pd
+from typing import Dict, List, Optional, Tuple, Union
 import requests
-from unidecode import unidecode
+from requests.adapters import HTTPAdapter
+
+from airflow.models import Variable
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
+from harvest import HarvestStore, harvest_key
 from hooks.dou_hook import DOUHook
 from hooks.inlabs_hook import INLABSHook
+from utils.checkpoint import SearchCheckpoint
+from utils.circuit_breaker import CircuitBreaker
+from utils.disk_cache import DiskCache
+from utils.normalization import normalize, normalize_many, normalize_term
+from utils.rate_limiter import RateLimiter
+from utils.term_list import TermList
 from utils.search_domains import (
     Field,
     SearchDate,
@@ -34,21 +41,17 @@ class BaseSearcher(ABC):
     SCRAPPING_INTERVAL = 1
     CLEAN_HTML_RE = re.compile("<.*?>")
 
-    def _cast_term_list(self, pre_term_list: Dict[list, str]) -> list:
-        """If `pre_term_list` is a str (in the case it came from xcom)
-        then its necessary to convert it back to dataframe and return
-        the first column. Otherwise the `pre_term_list` is returned.
+    def _cast_term_list(self, pre_term_list: Union[TermList, List[str], str]) -> list:
+        """Returns the list of terms of `pre_term_list`, which may also
+        be a `TermList` or the terms table received through xcom from
+        `select_terms_from_db`.
         """
-        return (
-            pre_term_list
-            if isinstance(pre_term_list, list)
-            else pd.read_json(pre_term_list).iloc[:, 0].tolist()
-        )
+        return TermList.parse(pre_term_list).terms
 
     def _group_results(
         self,
         search_results: dict,
-        term_list: Dict[list, str],
+        term_list: Union[TermList, List[str], str],
         department: list[str] = None,
     ) -> dict:
         """Produces a grouped result based on departments and group name.
@@ -58,7 +61,8 @@ class BaseSearcher(ABC):
         """
         dpt_grouped_result = self._group_by_department(search_results, department)
 
-        if isinstance(term_list, str) and len(ast.literal_eval(term_list).values()) > 1:
+        term_list = TermList.parse(term_list)
+        if term_list.groups is not None:
             grouped_result = self._group_by_term_group(dpt_grouped_result, term_list)
         else:
             grouped_result = {"single_group": dpt_grouped_result}
@@ -66,13 +70,13 @@ class BaseSearcher(ABC):
         return grouped_result
 
     @staticmethod
-    def _group_by_term_group(search_results: dict, term_n_group: str) -> dict:
+    def _group_by_term_group(
+        search_results: dict, term_n_group: Union[TermList, str]
+    ) -> dict:
         """Rebuild the dict grouping the results based on term_n_group
         mapping
         """
-        dict_struct = ast.literal_eval(term_n_group)
-        terms, groups = dict_struct.values()
-        term_group_map = dict(zip(terms.values(), groups.values()))
+        term_group_map = TermList.parse(term_n_group).group_map
 
         grouped_result = {}
         for k, v in search_results.items():
@@ -123,9 +127,7 @@ class BaseSearcher(ABC):
         whole_match = self._clean_html(abstract).replace("... ", "")
         norm_whole_match = self._normalize(whole_match)
 
-        norm_term = self._normalize(search_term)
-
-        return norm_term in norm_whole_match
+        return normalize_term(search_term) in norm_whole_match
 
     def _clean_html(self, raw_html: str) -> str:
         clean_text = re.sub(self.CLEAN_HTML_RE, "", raw_html)
@@ -134,16 +136,14 @@ class BaseSearcher(ABC):
     def _normalize(self, raw_str: str) -> str:
         """Remove characters (accents and other not alphanumeric) lower
         it and keep only one space between words"""
-        KEEPCHAR = string.punctuation + "—–"
-        text = unidecode(raw_str).lower()
-        text = "".join(c if c.isalnum() or c in KEEPCHAR else " " for c in text)
-        text = " ".join(text.split())
-        return text
+        return normalize(raw_str)
 
 
 class DOUSearcher(BaseSearcher):
     SPLIT_MATCH_RE = re.compile(r"(.*?)<.*?>(.*?)<.*?>")
+    RETRY_INTERVAL = 30
     dou_hook = DOUHook()
+    circuit_breaker = CircuitBreaker("in.gov.br")
 
     def exec_search(
         self,
@@ -156,9 +156,12 @@ class DOUSearcher(BaseSearcher):
         force_rematch: bool,
         department: List[str],
         reference_date: datetime,
+        use_harvest: bool = False,
+        checkpoint: SearchCheckpoint = None,
     ):
+        term_list = TermList.parse(term_list)
         search_results = self._search_all_terms(
-            self._cast_term_list(term_list),
+            term_list.terms,
             dou_sections,
             search_date,
             reference_date,
@@ -167,6 +170,8 @@ class DOUSearcher(BaseSearcher):
             ignore_signature_match,
             force_rematch,
             department,
+            use_harvest,
+            checkpoint,
         )
         group_results = self._group_results(search_results, term_list, department)
 
@@ -183,18 +188,39 @@ class DOUSearcher(BaseSearcher):
         ignore_signature_match,
         force_rematch,
         department,
+        use_harvest=False,
+        checkpoint=None,
     ) -> dict:
         search_results = {}
+        harvest_store = HarvestStore() if use_harvest else None
         for search_term in term_list:
             logging.info("Starting search for term: %s", search_term)
-            results = self._search_text_with_retry(
-                search_term=search_term,
-                sections=[Section[s] for s in dou_sections],
-                reference_date=trigger_date,
-                search_date=SearchDate[search_date],
-                field=Field[field],
-                is_exact_search=is_exact_search,
-            )
+            results = None
+            if checkpoint is not None:
+                results = checkpoint.get(search_term)
+                if results is not None:
+                    logging.info("Using checkpoint results for term: %s", search_term)
+            if results is None and harvest_store is not None:
+                results = harvest_store.get(
+                    harvest_key(
+                        search_term, dou_sections, search_date, field, is_exact_search
+                    ),
+                    trigger_date,
+                )
+            if results is None:
+                results = self.fetch_term(
+                    search_term,
+                    dou_sections,
+                    search_date,
+                    field,
+                    is_exact_search,
+                    trigger_date,
+                )
+                if checkpoint is not None:
+                    checkpoint.put(search_term, results)
+                time.sleep(self.SCRAPPING_INTERVAL * random() * 2)
+            else:
+                logging.info("Using stored results for term: %s", search_term)
             if ignore_signature_match:
                 results = [
                     r
@@ -202,10 +228,15 @@ class DOUSearcher(BaseSearcher):
                     if not self._is_signature(search_term, r.get("abstract"))
                 ]
             if force_rematch:
+                norm_term = normalize_term(search_term)
+                norm_abstracts = normalize_many(
+                    self._clean_html(r.get("abstract")).replace("... ", "")
+                    for r in results
+                )
                 results = [
                     r
-                    for r in results
-                    if self._really_matched(search_term, r.get("abstract"))
+                    for r, norm_abstract in zip(results, norm_abstracts)
+                    if norm_term in norm_abstract
                 ]
 
             if department:
@@ -219,10 +250,29 @@ class DOUSearcher(BaseSearcher):
             if results:
                 search_results[search_term] = results
 
-            time.sleep(self.SCRAPPING_INTERVAL * random() * 2)
-
         return search_results
 
+    def fetch_term(
+        self,
+        search_term: str,
+        dou_sections: List[str],
+        search_date: str,
+        field: str,
+        is_exact_search: bool,
+        reference_date: datetime,
+    ) -> list:
+        """Fetches the raw results of a single term from the DOU
+        API, without any filtering or formatting.
+        """
+        return self._search_text_with_retry(
+            search_term=search_term,
+            sections=[Section[s] for s in dou_sections],
+            reference_date=reference_date,
+            search_date=SearchDate[search_date],
+            field=Field[field],
+            is_exact_search=is_exact_search,
+        )
+
     def _add_standard_highlight_formatting(self, results: list) -> None:
         for result in results:
             result["abstract"] = (
@@ -241,12 +291,18 @@ class DOUSearcher(BaseSearcher):
         is_exact_search,
         max_retries=5,
     ) -> list:
+        """Searches the term retrying on errors. The retries of all
+        terms share the `circuit_breaker`: once the DOU is considered
+        down the search fails immediately with `CircuitOpenError`
+        instead of sleeping and retrying term by term.
+        """
 
         retry = 1
 
         while True:
+            self.circuit_breaker.check()
             try:
-                return self.dou_hook.search_text(
+                results = self.dou_hook.search_text(
                     search_term=search_term,
                     sections=sections,
                     reference_date=reference_date,
@@ -254,16 +310,23 @@ class DOUSearcher(BaseSearcher):
                     field=field,
                     is_exact_search=is_exact_search,
                 )
-            except:
+            except Exception:
+                self.circuit_breaker.record_failure()
                 if retry > max_retries:
                     logging.error("Error - Max retries reached")
-                    raise Exception
+                    raise
+                # fail fast if the consecutive failures opened the circuit
+                self.circuit_breaker.check()
                 logging.info("Attemp %s of %s: ", retry, max_retries)
                 logging.info(
-                    "Sleeping for 30 seconds before retry " "dou_hook.search_text()."
+                    "Sleeping for %s seconds before retry dou_hook.search_text().",
+                    self.RETRY_INTERVAL,
                 )
-                time.sleep(30)
+                time.sleep(self.RETRY_INTERVAL)
                 retry += 1
+            else:
+                self.circuit_breaker.record_success()
+                return results
 
     def _is_signature(self, search_term: str, abstract: str) -> bool:
         """Verifica se o `search_term` (geralmente usado para busca por
@@ -282,7 +345,7 @@ class DOUSearcher(BaseSearcher):
 
         norm_abstract = self._normalize(clean_abstract)
         norm_abstract_without_start_name = norm_abstract[len(start_name) :]
-        norm_term = self._normalize(search_term)
+        norm_term = normalize_term(search_term)
 
         return (
             # Considera assinatura apenas se aparecem com uppercase
@@ -322,6 +385,45 @@ class DOUSearcher(BaseSearcher):
 class QDSearcher(BaseSearcher):
 
     API_BASE_URL = "https://queridodiario.ok.org.br/api/gazettes"
+    PAGE_SIZE = 100
+    MAX_WORKERS = 4
+    MAX_REQUESTS_PER_SECOND = 4
+    REQUEST_TIMEOUT = 60
+    # gazettes are indexed some days after their publication, so the
+    # results of recent dates may still change
+    INGESTION_WINDOW_DAYS = 3
+    CACHE_TTL_RECENT_DATE = 3600
+    CACHE_TTL_EMPTY = 6 * 3600
+
+    _session = None
+    _rate_limiter = None
+    _cache = None
+
+    @property
+    def cache(self) -> DiskCache:
+        """On disk cache of parsed responses, shared by all the QD
+        DAGs and task retries."""
+        if self._cache is None:
+            self._cache = DiskCache("querido_diario")
+        return self._cache
+
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session pooling the connections of all the pages and
+        terms, created on first use."""
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=self.MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        if self._rate_limiter is None:
+            self._rate_limiter = RateLimiter(self.MAX_REQUESTS_PER_SECOND)
+        return self._rate_limiter
 
     def exec_search(
         self,
@@ -337,12 +439,13 @@ class QDSearcher(BaseSearcher):
         result_as_email: bool = True,
     ):
         force_rematch = True if force_rematch is None else force_rematch
-        term_list = self._cast_term_list(term_list)
+        term_list = TermList.parse(term_list)
+        territory_ids = self._resolve_territory_ids(territory_id)
         tailored_date = reference_date - timedelta(days=1)
         search_results = {}
         for search_term in term_list:
             results = self._search_term(
-                territory_id=territory_id,
+                territory_id=territory_ids,
                 search_term=search_term,
                 reference_date=tailored_date,
                 force_rematch=force_rematch,
@@ -350,9 +453,52 @@ class QDSearcher(BaseSearcher):
             )
             if results:
                 search_results[search_term] = results
-            time.sleep(self.SCRAPPING_INTERVAL * random() * 2)
 
-        return self._group_results(search_results, term_list)
+        self.cache.log_stats()
+        grouped_results = self._group_results(search_results, term_list)
+        if len(territory_ids) > 1:
+            grouped_results = self._group_by_territory(grouped_results)
+
+        return grouped_results
+
+    @staticmethod
+    def _resolve_territory_ids(territory_id: Union[int, List[int], str, None]) -> list:
+        """Returns the list of territory ids to be searched.
+        `territory_id` may be a single id, a list of ids or the name of
+        an Airflow Variable holding a JSON list of ids (a named
+        territory group).
+        """
+        if territory_id is None:
+            return []
+        if isinstance(territory_id, list):
+            return territory_id
+        if isinstance(territory_id, str) and not territory_id.isdigit():
+            territory_ids = Variable.get(territory_id, deserialize_json=True)
+            logging.info(
+                "Territory group %s has %s territories.",
+                territory_id,
+                len(territory_ids),
+            )
+            return territory_ids
+        return [int(territory_id)]
+
+    @staticmethod
+    def _group_by_territory(grouped_results: dict) -> dict:
+        """Splits the results of each term by territory, using the
+        territory title (`Município de <territory_name> - <UF>`) in
+        place of the department level.
+        """
+        territory_grouped = {}
+        for group, terms in grouped_results.items():
+            territory_grouped[group] = {}
+            for term, departments in terms.items():
+                by_territory = {}
+                for results in departments.values():
+                    for result in results:
+                        by_territory.setdefault(result["title"], []).append(result)
+                territory_grouped[group][term] = dict(sorted(by_territory.items()))
+
+        return territory_grouped
 
     def _search_term(
         self,
@@ -362,20 +508,94 @@ class QDSearcher(BaseSearcher):
         force_rematch: bool,
         result_as_email: bool = True,
     ) -> list:
+        """Fetches all the gazettes matching `search_term`. The first
+        page tells the total of gazettes; the remaining pages are
+        fetched concurrently and parsed in order as they arrive.
+
+        `territory_id` may be a single id or a list of ids, sent in
+        the same query as repeated `territory_ids` parameters.
+        """
         payload = _build_query_payload(search_term, reference_date)
 
         if territory_id:
-            payload.append(("territory_ids", territory_id))
+            territory_ids = (
+                territory_id if isinstance(territory_id, list) else [territory_id]
+            )
+            payload.extend(("territory_ids", t) for t in territory_ids)
+
+        cache_key = json.dumps([payload, result_as_email], ensure_ascii=False)
+        parsed_results = self.cache.get(cache_key)
+        if parsed_results is not None:
+            return parsed_results
 
-        req_result = requests.get(self.API_BASE_URL, params=payload)
+        parsed_results = self._fetch_all_pages(payload, search_term, result_as_email)
 
+        self.cache.set(
+            cache_key,
+            parsed_results,
+            ttl=self._cache_ttl(reference_date, parsed_results),
+        )
+        time.sleep(self.SCRAPPING_INTERVAL * random() * 2)
+
+        return parsed_results
+
+    def _cache_ttl(
+        self, reference_date: datetime, parsed_results: list
+    ) -> Optional[float]:
+        """Seconds to keep a response in the cache. Only the responses
+        with results for dates past the ingestion window are kept until
+        evicted, as a late indexed gazette may still show up in the
+        others."""
+        ingested_until = datetime.now().date() - timedelta(
+            days=self.INGESTION_WINDOW_DAYS
+        )
+        if reference_date.date() >= ingested_until:
+            return self.CACHE_TTL_RECENT_DATE
+        if not parsed_results:
+            return self.CACHE_TTL_EMPTY
+        return None
+
+    def _fetch_all_pages(
+        self, payload: List[tuple], search_term: str, result_as_email: bool
+    ) -> list:
+        first_page = self._request_page(payload, offset=0)
         parsed_results = [
             self.parse_result(result, result_as_email)
-            for result in json.loads(req_result.content)["gazettes"]
+            for result in first_page["gazettes"]
         ]
 
+        total = first_page.get("total_gazettes", len(parsed_results))
+        offsets = range(self.PAGE_SIZE, total, self.PAGE_SIZE)
+        if offsets:
+            logging.info(
+                "Fetching %s gazettes for term %s in %s pages.",
+                total,
+                search_term,
+                len(offsets) + 1,
+            )
+            with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+                pages = [
+                    executor.submit(self._request_page, payload, offset)
+                    for offset in offsets
+                ]
+                for page in pages:
+                    parsed_results.extend(
+                        self.parse_result(result, result_as_email)
+                        for result in page.result()["gazettes"]
+                    )
+
         return parsed_results
 
+    def _request_page(self, payload: List[tuple], offset: int) -> dict:
+        self.rate_limiter.wait()
+        response = self.session.get(
+            self.API_BASE_URL,
+            params=payload + [("offset", offset)],
+            timeout=self.REQUEST_TIMEOUT,
+        )
+        response.raise_for_status()
+        return response.json()
+
     def parse_result(self, result: dict, result_as_email: bool = True) -> dict:
         section = (
             "extraordinária" if result.get("is_extra_edition", False) else "ordinária"
@@ -399,7 +619,7 @@ class QDSearcher(BaseSearcher):
 
 def _build_query_payload(search_term: str, reference_date: datetime) -> List[tuple]:
     return [
-        ("size", 100),
+        ("size", QDSearcher.PAGE_SIZE),
         ("excerpt_size", 250),
         ("sort_by", "descending_date"),
         ("pre_tags", "<%%>"),
@@ -420,7 +640,7 @@ class INLABSSearcher(BaseSearcher):
 
     def exec_search(
         self,
-        terms: Union[List[str], str],
+        terms: Union[TermList, List[str], str],
         dou_sections: List[str],
         search_date: str,
         department: List[str],
@@ -434,8 +654,9 @@ class INLABSSearcher(BaseSearcher):
         transforming terms as needed.
 
         Args:
-            terms (Union[List[str], str]): Search terms as a List or a
-                string formatted as a dict (when from sql query).
+            terms (Union[TermList, List[str], str]): Search terms as a
+                TermList, a List or a string formatted as a dict (when
+                from sql query).
             dou_sections (List[str]): List of DOU sections to filter the search.
                 dou_sections examples: SECAO_1, SECAO_3D, EDICAO_EXTRA_1
             search_date (str): Date interval filter.
@@ -466,13 +687,13 @@ class INLABSSearcher(BaseSearcher):
 
         return group_results
 
-    def _prepare_search_terms(self, terms: Union[List[str], str]) -> Dict:
+    def _prepare_search_terms(self, terms: Union[TermList, List[str], str]) -> Dict:
         """Prepare search terms based on input terms.
 
         Args:
-            terms (Union[List[str], str]): Can be one of:
-                String formatted as dictionary when comes from a database
-                query
+            terms (Union[TermList, List[str], str]): Can be one of:
+                TermList or string formatted as dictionary when comes
+                from a database query
                 List when comes from `terms` key of the .yaml
         Returns:
             Dict: Formatted as {"texto": List of terms}
@@ -480,7 +701,7 @@ class INLABSSearcher(BaseSearcher):
 
         if isinstance(terms, List):
             return {"texto": terms}
-        return {"texto": self._split_sql_terms(json.loads(terms))}
+        return {"texto": self._split_sql_terms(terms)}
 
     def _apply_filters(
         self,
@@ -508,12 +729,10 @@ class INLABSSearcher(BaseSearcher):
         return search_terms
 
     @staticmethod
-    def _split_sql_terms(terms: Dict) -> List:
+    def _split_sql_terms(terms: Union[TermList, Dict]) -> List:
         """Split SQL terms into a list, removing duplicates.
-        Get only the values from the first key of the Dict."""
-
-        first_key = next(iter(terms))
-        return list(set(terms[first_key].values()))
+        Get only the terms, from the first column of the table."""
+        return list(dict.fromkeys(TermList.parse(terms).terms))
 
     @staticmethod
     def _parse_sections(sections: List) -> List:
@@ -0,0 +1,185 @@
+"""Distribution of the YAML configs among several DAG files.
+
+By default every DAG is created by the single `dou_dag_generator.py`
+file. With `RO_DOU__DAG_SHARDING` enabled, that file creates no DAG and
+small stub files, written by this module, each create the DAGs of one
+shard: either a stable hash partition of the config paths or a
+sub-directory of the config folders. The DAG processor then parses the shards in
+parallel, and a broken YAML or a re-parse only affects its own shard. The
+harvest DAG, which needs the terms of every config, has a stub of its own.
+
+Usage:
+
+    python sharding.py <dags_folder> <shard_count>
+    python sharding.py <dags_folder> --by-directory
+"""
+
+import argparse
+import hashlib
+import os
+from typing import List, Optional
+
+ROOT_DIRECTORY = "."
+STUB_PREFIX = "ro_dou_shard_"
+# the hyphen never appears in the stub names of the shards
+HARVEST_STUB_NAME = f"{STUB_PREFIX}-harvest"
+
+STUB_TEMPLATE = '''"""Ro-DOU airflow DAG shard generated by `sharding.py`. Do not edit.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), {src_dir!r}))
+from dou_dag_generator import DouDigestDagGenerator
+
+DouDigestDagGenerator().generate_dags(
+    {shard_kwargs}, target_globals=globals()
+)
+'''
+
+
+def relative_config_path(filepath: str, base_dirs: List[str]) -> str:
+    """Path of `filepath` relative to the config folder holding it, so
+    that the shards do not change when the folders are mounted
+    elsewhere."""
+    filepath = os.path.abspath(filepath)
+    for base_dir in base_dirs:
+        base_dir = os.path.abspath(base_dir)
+        if filepath.startswith(base_dir + os.sep):
+            return os.path.relpath(filepath, base_dir)
+    return filepath
+
+
+def hash_shard(filepath: str, base_dirs: List[str], shard_count: int) -> int:
+    """Stable hash partition of a config file among `shard_count`
+    shards."""
+    relative_path = relative_config_path(filepath, base_dirs)
+    digest = hashlib.sha1(relative_path.encode("utf-8")).hexdigest()
+    return int(digest, 16) % shard_count
+
+
+def config_subdirectory(filepath: str, base_dirs: List[str]) -> str:
+    """Top level sub-directory of a config file inside its config
+    folder, or `ROOT_DIRECTORY` for the files directly in it."""
+    parts = relative_config_path(filepath, base_dirs).split(os.sep)
+    return parts[0] if len(parts) > 1 else ROOT_DIRECTORY
+
+
+def select_shard(
+    files_list: List[str],
+    base_dirs: List[str],
+    shard_index: Optional[int] = None,
+    shard_count: Optional[int] = None,
+    subdirectory: Optional[str] = None,
+) -> List[str]:
+    """Filters the config files belonging to a shard."""
+    if subdirectory is not None:
+        return [
+            filepath
+            for filepath in files_list
+            if config_subdirectory(filepath, base_dirs) == subdirectory
+        ]
+    if shard_count:
+        return [
+            filepath
+            for filepath in files_list
+            if hash_shard(filepath, base_dirs, shard_count) == shard_index
+        ]
+    return files_list
+
+
+def write_stubs(
+    dags_dir: str,
+    src_dir: str,
+    shard_count: Optional[int] = None,
+    subdirectories: Optional[List[str]] = None,
+) -> List[str]:
+    """Writes one stub DAG file per shard, plus the stub of the harvest
+    DAG, in `dags_dir`, replacing the stubs written before.
+
+    Args:
+        dags_dir (str): Folder of the stub files, inside the Airflow
+            DAGs folder.
+        src_dir (str): Folder of `dou_dag_generator.py`.
+        shard_count (int, optional): Number of hash partitions.
+        subdirectories (list, optional): Sub-directories of the config
+            folders, one shard each. Takes precedence over
+            `shard_count`.
+
+    Returns:
+        list: The paths of the stub files.
+    """
+    for filename in os.listdir(dags_dir):
+        if filename.startswith(STUB_PREFIX) and filename.endswith(".py"):
+            os.remove(os.path.join(dags_dir, filename))
+
+    if subdirectories is not None:
+        shards = [
+            (name, f"subdirectory={name!r}") for name in sorted(subdirectories)
+        ]
+    else:
+        shards = [
+            (f"{i:03d}", f"shard_index={i}, shard_count={shard_count}")
+            for i in range(shard_count)
+        ]
+
+    stub_names = []
+    for name, shard_kwargs in shards:
+        if name == ROOT_DIRECTORY:
+            name = "root"
+        stub_name = "".join(c if c.isalnum() else "_" for c in name)
+        stub_names.append((f"{STUB_PREFIX}{stub_name}", shard_kwargs))
+    stub_names.append((HARVEST_STUB_NAME, "harvest=True"))
+
+    src_dir = os.path.relpath(os.path.abspath(src_dir), os.path.abspath(dags_dir))
+    stubs = []
+    for stub_name, shard_kwargs in stub_names:
+        stub_path = os.path.join(dags_dir, f"{stub_name}.py")
+        with open(stub_path, "w", encoding="utf-8") as f:
+            f.write(STUB_TEMPLATE.format(src_dir=src_dir, shard_kwargs=shard_kwargs))
+        stubs.append(stub_path)
+    return stubs
+
+
+def _config_subdirectories(base_dirs: List[str]) -> List[str]:
+    subdirectories = set()
+    for base_dir in base_dirs:
+        for entry in os.scandir(base_dir):
+            if entry.is_dir():
+                subdirectories.add(entry.name)
+            elif entry.name.endswith((".yaml", ".yml")):
+                subdirectories.add(ROOT_DIRECTORY)
+    return sorted(subdirectories)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Writes the Ro-DOU DAG shard stub files."
+    )
+    arg_parser.add_argument("dags_dir", help="folder of the stub files")
+    arg_parser.add_argument("shard_count", type=int, nargs="?", default=None)
+    arg_parser.add_argument(
+        "--by-directory",
+        action="store_true",
+        help="one shard per sub-directory of RO_DOU__DAG_CONF_DIR",
+    )
+    args = arg_parser.parse_args()
+
+    if args.by_directory:
+        written = write_stubs(
+            args.dags_dir,
+            os.path.dirname(os.path.abspath(__file__)),
+            subdirectories=_config_subdirectories(
+                os.environ["RO_DOU__DAG_CONF_DIR"].split(":")
+            ),
+        )
+    elif args.shard_count:
+        written = write_stubs(
+            args.dags_dir,
+            os.path.dirname(os.path.abspath(__file__)),
+            shard_count=args.shard_count,
+        )
+    else:
+        arg_parser.error("shard_count or --by-directory is required")
+    print("\n".join(written))
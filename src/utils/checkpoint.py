@@ -0,0 +1,78 @@
+"""Checkpoint of the terms already searched by a task.
+
+When a task fails in the middle of a term list, the results of the terms
+already completed are kept in a JSON lines file, so that the next try
+of the same task instance only searches the remaining terms.
+"""
+
+import json
+import os
+import re
+import tempfile
+from typing import Optional
+
+
+class SearchCheckpoint:
+    """Append only store of `term -> results` for a task instance.
+
+    Args:
+        dag_id (str): The DAG id.
+        run_id (str): The DAG run id.
+        task_id (str): The task id.
+        base_dir (str, optional): Folder to keep the checkpoints.
+            Defaults to `RO_DOU__CHECKPOINT_DIR` or the system temporary
+            folder.
+    """
+
+    def __init__(self, dag_id: str, run_id: str, task_id: str, base_dir: str = None):
+        base_dir = base_dir or os.getenv(
+            "RO_DOU__CHECKPOINT_DIR",
+            os.path.join(tempfile.gettempdir(), "ro_dou_checkpoints"),
+        )
+        file_name = re.sub(r"[^\w.-]", "_", f"{dag_id}__{run_id}__{task_id}")
+        self.path = os.path.join(base_dir, f"{file_name}.jsonl")
+        self._entries = None
+
+    @classmethod
+    def from_context(cls, context: dict, suffix: str = "") -> "SearchCheckpoint":
+        """Builds the checkpoint of the task instance running in
+        `context`."""
+        ti = context["ti"]
+        task_id = ti.task_id
+        if getattr(ti, "map_index", -1) >= 0:
+            task_id = f"{task_id}_{ti.map_index}"
+        return cls(ti.dag_id, context["run_id"], f"{task_id}{suffix}")
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            # the last line may be truncated by a killed task
+                            continue
+                        self._entries[entry["key"]] = entry["value"]
+            except OSError:
+                pass
+        return self._entries
+
+    def get(self, key: str) -> Optional[list]:
+        return self._load().get(key)
+
+    def put(self, key: str, value):
+        self._load()[key] = value
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "value": value}, ensure_ascii=False))
+            f.write("\n")
+
+    def clear(self):
+        """Removes the checkpoint after the task finishes successfully."""
+        self._entries = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
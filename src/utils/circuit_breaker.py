@@ -0,0 +1,135 @@
+"""Circuit breaker shared by the searches that hit the same source.
+
+The breaker state is kept in a small JSON file, so that all the terms of
+a run, and all the tasks running on the same node, see the same state.
+After `failure_threshold` consecutive failures the circuit opens and any
+new request fails immediately until `reset_timeout` seconds have passed.
+After that a single trial request is allowed (half-open): a success
+closes the circuit, a failure opens it again.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is attempted while the circuit is open."""
+
+
+class CircuitBreaker:
+    """File backed circuit breaker.
+
+    Args:
+        name (str): Name of the protected source. Breakers with the same
+            name share the same state.
+        failure_threshold (int): Consecutive failures that open the
+            circuit.
+        reset_timeout (int): Seconds to wait before allowing a trial
+            request after the circuit opens.
+        state_dir (str, optional): Folder to keep the state files.
+            Defaults to `RO_DOU__CIRCUIT_BREAKER_DIR` or the system
+            temporary folder.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: int = 600,
+        state_dir: str = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state_dir = state_dir or os.getenv(
+            "RO_DOU__CIRCUIT_BREAKER_DIR",
+            os.path.join(tempfile.gettempdir(), "ro_dou_circuit_breaker"),
+        )
+        self.state_path = os.path.join(self.state_dir, f"{name}.json")
+
+    @staticmethod
+    def _load(f) -> dict:
+        try:
+            state = json.loads(f.read() or "{}")
+        except ValueError:
+            state = {}
+        state.setdefault("failures", 0)
+        state.setdefault("opened_at", None)
+        return state
+
+    @contextmanager
+    def _state(self):
+        """Yields the state dict holding an exclusive lock on the state
+        file, writing it back on exit."""
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(self.state_path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                state = self._load(f)
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def check(self):
+        """Raises `CircuitOpenError` if the circuit is open."""
+        with self._state() as state:
+            opened_at = state["opened_at"]
+            if opened_at is None:
+                return
+            remaining = opened_at + self.reset_timeout - time.time()
+            if remaining > 0:
+                raise CircuitOpenError(
+                    f"Circuit `{self.name}` is open after "
+                    f"{state['failures']} consecutive failures. "
+                    f"Next trial in {int(remaining)} seconds."
+                )
+            # half-open: let a single trial request through
+            state["opened_at"] = time.time()
+            logging.info("Circuit `%s` is half-open, trying a request.", self.name)
+
+    def record_success(self):
+        with self._state() as state:
+            if state["opened_at"] is not None:
+                logging.info("Circuit `%s` closed.", self.name)
+            state["failures"] = 0
+            state["opened_at"] = None
+
+    def record_failure(self):
+        """Counts a failure, opening the circuit when the threshold is
+        reached."""
+        with self._state() as state:
+            state["failures"] += 1
+            if state["failures"] >= self.failure_threshold:
+                if state["opened_at"] is None:
+                    logging.error(
+                        "Circuit `%s` opened after %s consecutive failures.",
+                        self.name,
+                        state["failures"],
+                    )
+                state["opened_at"] = time.time()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are currently refused. Unlike `check`, it
+        only reads the state, so it does not use up the trial request
+        of the half-open circuit."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                try:
+                    state = self._load(f)
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        except FileNotFoundError:
+            return False
+        opened_at = state["opened_at"]
+        return opened_at is not None and opened_at + self.reset_timeout > time.time()
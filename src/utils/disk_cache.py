@@ -0,0 +1,111 @@
+"""Persistent key-value cache kept in local files.
+
+Each entry is a pickle file named after the hash of its key, holding the
+value and its expiration time. Reading an entry refreshes its
+modification time, which is used to evict the least recently used
+entries once the cache grows beyond `max_entries`.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Optional
+
+
+class DiskCache:
+    """LRU cache with optional TTL stored in `<base_dir>/<name>`.
+
+    Args:
+        name (str): Name of the cache, used as its folder name.
+        max_entries (int): Number of entries kept after an eviction.
+        base_dir (str, optional): Parent folder of the caches. Defaults
+            to `RO_DOU__CACHE_DIR` or the system temporary folder.
+    """
+
+    EVICTION_INTERVAL = 100
+
+    def __init__(self, name: str, max_entries: int = 10000, base_dir: str = None):
+        base_dir = base_dir or os.getenv(
+            "RO_DOU__CACHE_DIR", os.path.join(tempfile.gettempdir(), "ro_dou_cache")
+        )
+        self.name = name
+        self.path = os.path.join(base_dir, name)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+
+    def _entry_path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, f"{digest}.pickle")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Returns the cached value of `key`, or `default` if it is
+        missing or expired."""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            self.misses += 1
+            return default
+
+        if expires_at is not None and expires_at < time.time():
+            self._remove(entry_path)
+            self.misses += 1
+            return default
+
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Stores `value` under `key`. Entries without `ttl` (seconds)
+        never expire, being removed only by the LRU eviction."""
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        expires_at = time.time() + ttl if ttl is not None else None
+        entry_path = self._entry_path(key)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+
+        self._writes += 1
+        if self._writes % self.EVICTION_INTERVAL == 0:
+            self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries above `max_entries`."""
+        try:
+            entries = [
+                entry
+                for entry in os.scandir(self.path)
+                if entry.name.endswith(".pickle")
+            ]
+        except OSError:
+            return
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:excess]:
+            self._remove(entry.path)
+        logging.info("Cache %s: evicted %s entries.", self.name, excess)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def log_stats(self):
+        logging.info(
+            "Cache %s: %s hits, %s misses.", self.name, self.hits, self.misses
+        )
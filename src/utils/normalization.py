@@ -0,0 +1,100 @@
+"""Text normalization shared by all the searchers.
+
+Every source (DOU, QD and INLABS) compares search terms with publication
+texts after removing accents, case and, for the term matching, the
+characters that are not alphanumeric or punctuation. The conversion of
+each character is precomputed in translation tables, so normalizing a
+text is a couple of `str.translate` calls instead of a Python loop over
+its characters. Characters outside the tables fall back to `unidecode`.
+"""
+
+import string
+from functools import lru_cache
+from typing import Iterable, List
+
+from unidecode import unidecode
+
+KEEPCHAR = string.punctuation + "—–"
+
+# Latin-1 Supplement, Latin Extended-A/B and General Punctuation cover
+# virtually all the characters found in the Brazilian gazettes.
+_TABLE_RANGES = (range(0x80, 0x250), range(0x2000, 0x2070))
+
+
+def _fold_char(char: str) -> str:
+    return unidecode(char).lower()
+
+
+def _keep_or_space(text: str) -> str:
+    return "".join(c if c.isalnum() or c in KEEPCHAR else " " for c in text)
+
+
+def _build_tables():
+    fold_table = {ord(c): c.lower() for c in string.ascii_uppercase}
+    normalize_table = {cp: _keep_or_space(chr(cp).lower()) for cp in range(0x80)}
+    for table_range in _TABLE_RANGES:
+        for cp in table_range:
+            folded = _fold_char(chr(cp))
+            fold_table[cp] = folded
+            normalize_table[cp] = _keep_or_space(folded)
+    return fold_table, normalize_table
+
+
+_FOLD_TABLE, _NORMALIZE_TABLE = _build_tables()
+# the characters not folded into a single one are only lowered
+_ALIGNED_FOLD_TABLE = {
+    cp: folded if len(folded) == 1 else chr(cp).lower()
+    for cp, folded in _FOLD_TABLE.items()
+    if len(folded) == 1 or len(chr(cp).lower()) == 1
+}
+
+
+def strip_accents(text: str) -> str:
+    """Removes accents and lowers the text, keeping every other
+    character. Non string values are converted to an empty string.
+    """
+    if not isinstance(text, str):
+        return ""
+    folded = text.translate(_FOLD_TABLE)
+    if not folded.isascii():
+        folded = unidecode(folded).lower()
+    return folded
+
+
+def strip_accents_aligned(text: str) -> str:
+    """Removes accents and lowers the text keeping its length, so that
+    the positions found in the result are valid in `text`. The
+    characters that do not fold into a single one are only lowered.
+    """
+    return text.translate(_ALIGNED_FOLD_TABLE)
+
+
+def normalize(text: str) -> str:
+    """Removes accents and characters that are not alphanumeric or
+    punctuation, lowers the text and keeps only one space between
+    words.
+    """
+    translated = text.translate(_NORMALIZE_TABLE)
+    if not translated.isascii():
+        translated = _keep_or_space(unidecode(translated).lower())
+    return " ".join(translated.split())
+
+
+@lru_cache(maxsize=65536)
+def normalize_term(term: str) -> str:
+    """Memoized `normalize` for search terms, which are normalized
+    again for every result they match.
+    """
+    return normalize(term)
+
+
+def normalize_many(texts: Iterable[str]) -> List[str]:
+    """Normalizes a batch of texts."""
+    table = _NORMALIZE_TABLE
+    normalized = []
+    for text in texts:
+        translated = text.translate(table)
+        if not translated.isascii():
+            translated = _keep_or_space(unidecode(translated).lower())
+        normalized.append(" ".join(translated.split()))
+    return normalized
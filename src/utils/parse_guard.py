@@ -0,0 +1,54 @@
+"""Detection of metadata lookups while the DAG files are parsed.
+
+`BaseHook.get_connection` and `Variable.get` query the metadata database
+or the secrets backend on every call. Done while the scheduler parses
+the DAG files, they are repeated on every parse loop and slow down the
+parsing of the whole cluster, so they should happen inside the tasks.
+"""
+
+import logging
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from airflow.hooks.base import BaseHook
+from airflow.models import Variable
+
+
+class ParseTimeAccessError(RuntimeError):
+    """Raised on a metadata lookup during the parse in strict mode."""
+
+
+def _guarded(kind: str, original, accesses: List[Tuple[str, str]], strict: bool):
+    def wrapper(*args, **kwargs):
+        key = args[0] if args else next(iter(kwargs.values()), None)
+        accesses.append((kind, key))
+        message = f"{kind} `{key}` accessed while parsing the DAG files."
+        if strict:
+            raise ParseTimeAccessError(message)
+        logging.warning(message)
+        return original(*args, **kwargs)
+
+    return staticmethod(wrapper)
+
+
+@contextmanager
+def guard_metadata_access(strict: bool = False):
+    """Logs the connections and Variables accessed inside the context,
+    or raises `ParseTimeAccessError` if `strict`.
+
+    Yields:
+        list: The `(kind, key)` of each access.
+    """
+    accesses = []
+    patched = [
+        (BaseHook, "get_connection", "Connection"),
+        (Variable, "get", "Variable"),
+    ]
+    originals = [(owner, name, owner.__dict__[name]) for owner, name, _ in patched]
+    for owner, name, kind in patched:
+        setattr(owner, name, _guarded(kind, getattr(owner, name), accesses, strict))
+    try:
+        yield accesses
+    finally:
+        for owner, name, descriptor in originals:
+            setattr(owner, name, descriptor)
@@ -0,0 +1,28 @@
+"""Thread safe rate limiter for the requests made to external APIs.
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """Spaces the calls to `wait` so that at most `rate` of them
+    proceed per second, across all the threads sharing the instance.
+
+    Args:
+        rate (float): Maximum calls per second.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        """Blocks until the caller may proceed."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
@@ -0,0 +1,96 @@
+"""Storage of the search results outside the Airflow metadata database.
+
+With `RO_DOU__RESULT_STORE_DIR` set, the search tasks write their
+results as gzip compressed JSON files in that folder, which must be
+shared by all the workers, and return as XCom only a small reference
+with a summary of the results. Without it the results are returned as
+XCom, as before.
+"""
+
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+from typing import Optional
+
+REFERENCE_KEY = "result_store_path"
+
+
+def is_reference(value) -> bool:
+    """Whether an XCom value is a reference to a stored result."""
+    return isinstance(value, dict) and REFERENCE_KEY in value
+
+
+class ResultStore:
+    """Compressed JSON files in `<base_dir>/<dag_id>/<run_id>/`.
+
+    Args:
+        base_dir (str): Folder of the results, shared by the workers.
+        retention_days (float): Age after which the results of past DAG
+            runs are removed.
+    """
+
+    def __init__(self, base_dir: str, retention_days: float = 7):
+        self.base_dir = base_dir
+        self.retention_days = retention_days
+
+    @classmethod
+    def from_env(cls) -> Optional["ResultStore"]:
+        """The store configured by the environment, or None if the
+        results should be kept in XCom."""
+        base_dir = os.getenv("RO_DOU__RESULT_STORE_DIR")
+        if not base_dir:
+            return None
+        return cls(
+            base_dir,
+            float(os.getenv("RO_DOU__RESULT_STORE_RETENTION_DAYS", "7")),
+        )
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        return re.sub(r"[^\w.-]", "_", name)
+
+    def put(self, value, summary: dict, **context) -> dict:
+        """Stores the result of the task instance running in `context`
+        and returns its reference."""
+        ti = context["ti"]
+        task_id = ti.task_id
+        if getattr(ti, "map_index", -1) >= 0:
+            task_id = f"{task_id}_{ti.map_index}"
+        dag_dir = os.path.join(self.base_dir, self._safe_name(ti.dag_id))
+        run_dir = os.path.join(dag_dir, self._safe_name(context["run_id"]))
+        path = os.path.join(run_dir, f"{self._safe_name(task_id)}.json.gz")
+
+        os.makedirs(run_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(value, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+        self.purge(dag_dir, keep=run_dir)
+        return {REFERENCE_KEY: path, "summary": summary}
+
+    @staticmethod
+    def load(reference: dict):
+        """Reads a stored result from its reference."""
+        with gzip.open(reference[REFERENCE_KEY], "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def purge(self, dag_dir: str, keep: str = None):
+        """Removes the results of the DAG runs older than the
+        retention."""
+        expires_before = time.time() - self.retention_days * 86400
+        try:
+            entries = list(os.scandir(dag_dir))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.path == keep or not entry.is_dir():
+                continue
+            try:
+                if entry.stat().st_mtime < expires_before:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                pass
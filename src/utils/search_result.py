@@ -0,0 +1,222 @@
+"""Helpers for the nested search results.
+
+The searchers return their matches as `{group: {term: {department:
+[match, ...]}}}`, where each match is a dict with the `section`,
+`title`, `href`, `abstract` and `date` of a publication. The results go
+through XCom as JSON, so this structure is kept as is, and these helpers
+make the work done on it cheaper:
+
+- `merge_results` merges the results of several sources or chunks in a
+  single pass, keeping the order of the groups, terms and departments;
+- `intern_result` shares the repeated strings of the matches (sections,
+  dates, departments) between all of them after the results are loaded;
+- `iter_hits` walks the matches of a search report as flat `Hit`
+  records, instead of four nested loops in each sender;
+- `deduplicate_report` keeps once each publication matched by several
+  terms or sources of a search.
+
+The generator imports this module while the scheduler parses the DAG
+files, so it imports only the standard library at module level.
+"""
+
+import re
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+SearchResult = Dict[str, Dict[str, Dict[str, List[dict]]]]
+
+# match fields with few distinct values among many matches
+INTERNED_FIELDS = ("section", "date")
+
+# highlighted terms and HTML tags, left untouched by `highlight_terms`
+PROTECTED_RE = re.compile(r"<%%>.*?</%%>|<[^>]*>", re.DOTALL)
+
+
+def _merge_into(target: dict, source: dict):
+    for key, value in source.items():
+        current = target.get(key)
+        if isinstance(value, dict):
+            if isinstance(current, dict):
+                _merge_into(current, value)
+            else:
+                # copied, so that merging the next sources does not
+                # change the inputs
+                target[key] = _merge_into({}, value)
+        elif isinstance(current, dict):
+            # a dict is preferred over a list of matches
+            continue
+        elif current is None:
+            target[key] = list(value) if isinstance(value, list) else value
+        elif isinstance(current, list):
+            # a copy owned by the merged result
+            current.extend(value)
+        else:
+            target[key] = current + value
+    return target
+
+
+def merge_results(*dicts: SearchResult) -> SearchResult:
+    """
+    Merge multiple dictionaries and sum/concatenate values of common keys,
+    including nested dictionaries.
+
+    The results whose first group is empty (searches without matches)
+    are ignored. Each match is visited once, so merging the results of
+    many chunks is linear on the number of matches. The inputs are not
+    changed.
+    """
+    merged = {}
+    for result in dicts:
+        if result and next(iter(result.values())):
+            _merge_into(merged, result)
+    return merged
+
+
+def intern_result(result: SearchResult) -> SearchResult:
+    """Interns, in place, the keys of `result` and the `INTERNED_FIELDS`
+    of its matches, so that the copies of the same string decoded from
+    JSON share a single object."""
+    intern = sys.intern
+    for group in list(result):
+        terms = result.pop(group)
+        for term in list(terms):
+            departments = terms.pop(term)
+            for department in list(departments):
+                matches = departments.pop(department)
+                for match in matches:
+                    for field in INTERNED_FIELDS:
+                        value = match.get(field)
+                        if isinstance(value, str):
+                            match[field] = intern(value)
+                departments[intern(department)] = matches
+            terms[intern(term)] = departments
+        result[intern(group)] = terms
+    return result
+
+
+class Hit:
+    """A match of a search report, with its place in the report."""
+
+    __slots__ = ("header", "group", "term", "department", "match")
+
+    def __init__(
+        self, header: str, group: str, term: str, department: str, match: dict
+    ):
+        self.header = header
+        self.group = group
+        self.term = term
+        self.department = department
+        self.match = match
+
+    def __repr__(self) -> str:
+        return (
+            f"Hit({self.header!r}, {self.group!r}, {self.term!r}, "
+            f"{self.department!r}, {self.match.get('href')!r})"
+        )
+
+
+def iter_hits(search_report: List[dict]) -> Iterator[Hit]:
+    """Every match of the searches of a report, in the report order."""
+    for search in search_report:
+        header = search["header"] if search["header"] else None
+        for group, terms in search["result"].items():
+            for term, departments in terms.items():
+                for department, matches in departments.items():
+                    for match in matches:
+                        yield Hit(header, group, term, department, match)
+
+
+def publication_key(match: dict) -> Optional[str]:
+    """Canonical id of the publication of a match: its URL or, for the
+    sources without URL, its id."""
+    if match.get("href"):
+        return match["href"]
+    if match.get("id"):
+        return f"id:{match['id']}"
+    return None
+
+
+def publication_source(match: dict) -> str:
+    """Source of a match, from the prefix of its section (`DOU - ...`,
+    `QD - ...`)."""
+    return (match.get("section") or "").split(" - ", 1)[0].strip()
+
+
+def highlight_terms(text: str, terms: Iterable[str]) -> str:
+    """Wraps with `<%%>` and `</%%>` the whole word occurrences of
+    `terms` in `text`, ignoring case and accents. Occurrences already
+    highlighted or inside HTML tags are kept as they are."""
+    # pylint: disable=import-outside-toplevel
+    from utils.normalization import strip_accents_aligned
+
+    folded = strip_accents_aligned(text)
+    protected = [match.span() for match in PROTECTED_RE.finditer(text)]
+    spans = []
+    for term in terms:
+        folded_term = strip_accents_aligned(term.strip())
+        if not folded_term:
+            continue
+        pattern = re.compile(rf"(?<!\w){re.escape(folded_term)}(?!\w)")
+        for match in pattern.finditer(folded):
+            start, end = match.span()
+            overlaps = any(
+                start < other_end and other_start < end
+                for other_start, other_end in protected + spans
+            )
+            if not overlaps:
+                spans.append((start, end))
+
+    for start, end in sorted(spans, reverse=True):
+        text = f"{text[:start]}<%%>{text[start:end]}</%%>{text[end:]}"
+    return text
+
+
+def deduplicate_report(search_report: List[dict]) -> List[dict]:
+    """Keeps each publication once in each search of the report.
+
+    The publications are indexed by `publication_key`. The first match of
+    a publication stays in its place (group, term and department), with
+    the terms, groups and sources of all its matches in `matched_terms`,
+    `matched_groups` and `sources`, and all the matched terms
+    highlighted in its abstract. The other matches are removed, as are
+    the terms, departments and groups left without matches. The report
+    is not changed.
+    """
+    deduplicated_report = []
+    for search in search_report:
+        index = {}
+        result = {group: {} for group in search["result"]}
+        for hit in iter_hits([search]):
+            key = publication_key(hit.match)
+            publication = index.get(key) if key is not None else None
+            if publication is None:
+                publication = dict(
+                    hit.match, matched_terms=[], matched_groups=[], sources=[]
+                )
+                if key is not None:
+                    index[key] = publication
+                terms = result[hit.group]
+                terms.setdefault(hit.term, {}).setdefault(hit.department, []).append(
+                    publication
+                )
+            for field, value in (
+                ("matched_terms", hit.term),
+                ("matched_groups", hit.group),
+                ("sources", publication_source(hit.match)),
+            ):
+                if value not in publication[field]:
+                    publication[field].append(value)
+
+        for publication in index.values():
+            if len(publication["matched_terms"]) > 1 and publication.get("abstract"):
+                publication["abstract"] = highlight_terms(
+                    publication["abstract"], publication["matched_terms"]
+                )
+
+        # the groups without any match are kept, shown as such by the
+        # senders, but not the ones whose matches were all removed
+        for group, terms in search["result"].items():
+            if terms and not result[group]:
+                del result[group]
+        deduplicated_report.append(dict(search, result=result))
+    return deduplicated_report
@@ -0,0 +1,112 @@
+"""Typed list of search terms, with the optional group of each term.
+
+The terms of a subsearch come either from the YAML, as a list, or from
+`select_terms_from_db`, as a table whose first column holds the terms
+and whose optional second column holds the group of each term, used to
+group the report. `TermList` is the single representation of both,
+parsed once per task and shared by all the searchers. Between tasks it
+travels as the compact dict of `to_dict`.
+
+The table as serialized by `DataFrame.to_json(orient="columns")`, used
+by the previous versions, is still accepted.
+"""
+
+import ast
+import json
+from typing import Dict, Iterator, List, Optional, Union
+
+# terms shown by `str`, used in the task logs
+MAX_DISPLAYED_TERMS = 50
+
+
+class TermList:
+    """The terms to be searched and, optionally, the group of each one.
+
+    Args:
+        terms (list): The search terms.
+        groups (list, optional): The group of each term, aligned with
+            `terms`, or None when the terms are not grouped.
+    """
+
+    __slots__ = ("terms", "groups", "_group_map")
+
+    def __init__(self, terms: List[str], groups: Optional[List[str]] = None):
+        if groups is not None and len(groups) != len(terms):
+            raise ValueError("`terms` e `groups` devem ter o mesmo tamanho.")
+        self.terms = terms
+        self.groups = groups
+        self._group_map = None
+
+    @classmethod
+    def parse(cls, value: Union["TermList", List[str], dict, str]) -> "TermList":
+        """Builds the term list from any of its representations: a
+        `TermList`, a list of terms, the dict of `to_dict` or the
+        columns table, either decoded or as a JSON string."""
+        if isinstance(value, TermList):
+            return value
+        if isinstance(value, (list, tuple)):
+            return cls(list(value))
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                # tables rendered by Jinja as a Python literal
+                value = ast.literal_eval(value)
+        if isinstance(value, dict):
+            if isinstance(value.get("terms"), list):
+                return cls(value["terms"], value.get("groups"))
+            return cls._from_columns(value)
+        raise TypeError(f"Lista de termos inválida: {type(value).__name__}")
+
+    @classmethod
+    def _from_columns(cls, columns: Dict[str, Dict[str, str]]) -> "TermList":
+        values = list(columns.values())
+        if not values:
+            return cls([])
+        rows = list(values[0])
+        if all(row.isdigit() for row in rows):
+            rows.sort(key=int)
+        terms = [values[0][row] for row in rows]
+        groups = [values[1][row] for row in rows] if len(values) > 1 else None
+        return cls(terms, groups)
+
+    def to_dict(self) -> dict:
+        """Compact representation sent between tasks through XCom."""
+        return {"terms": self.terms, "groups": self.groups}
+
+    @property
+    def group_map(self) -> Dict[str, str]:
+        """The group of each term."""
+        if self._group_map is None:
+            self._group_map = dict(zip(self.terms, self.groups or []))
+        return self._group_map
+
+    def __getitem__(self, index: slice) -> "TermList":
+        return TermList(
+            self.terms[index],
+            self.groups[index] if self.groups is not None else None,
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, TermList)
+            and self.terms == other.terms
+            and self.groups == other.groups
+        )
+
+    def __str__(self) -> str:
+        displayed = ", ".join(self.terms[:MAX_DISPLAYED_TERMS])
+        hidden = len(self.terms) - MAX_DISPLAYED_TERMS
+        if hidden > 0:
+            displayed += f" (+{hidden} more)"
+        return displayed
+
+    def __repr__(self) -> str:
+        grouped = "grouped " if self.groups is not None else ""
+        return f"<TermList of {len(self.terms)} {grouped}terms>"
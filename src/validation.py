@@ -0,0 +1,213 @@
+"""Fast validation of the YAML config files.
+
+Validates the configs against the JSON schema shipped in
+`schemas/ro-dou.json`, compiled once per process, instead of building
+the pydantic models of `schemas.py`. Batches of files are validated in
+parallel processes, and the DAG ids are checked for duplicates across
+the batch. Intended for pre-deploy checks of large config folders:
+
+    python validation.py <dag_confs_dir> [<dir> ...] [--full] [--workers N]
+
+With `--full` the files that pass the JSON schema are also validated by
+the pydantic models, which hold some rules the JSON schema does not.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional
+
+import yaml
+from jsonschema.validators import validator_for
+
+SRC_DIR = os.path.abspath(os.path.dirname(__file__))
+SCHEMA_CANDIDATES = [
+    os.path.join(SRC_DIR, "..", "schemas", "ro-dou.json"),
+    # as mounted in the Airflow containers
+    os.path.join(SRC_DIR, "..", "..", "schemas", "ro-dou.json"),
+]
+# below this size the process pool costs more than it saves
+MIN_PARALLEL_FILES = 64
+# the libyaml loader is several times faster than the pure Python one
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class ConfigSummary(NamedTuple):
+    """Lightweight outcome of the validation of a config file."""
+
+    filepath: str
+    dag_id: Optional[str]
+    num_searches: int
+    errors: List[str]
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+
+def _load_schema() -> dict:
+    schema_path = os.getenv("RO_DOU__JSON_SCHEMA")
+    candidates = [schema_path] if schema_path else SCHEMA_CANDIDATES
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            with open(candidate, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+    # pylint: disable=import-outside-toplevel
+    sys.path.insert(0, SRC_DIR)
+    from schemas import RoDouConfig
+
+    return RoDouConfig.model_json_schema()
+
+
+@lru_cache(maxsize=1)
+def get_validator():
+    """The JSON schema validator, checked and compiled once per
+    process."""
+    schema = _load_schema()
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
+def _error_message(error) -> str:
+    location = "/".join(str(part) for part in error.absolute_path) or "<raiz>"
+    return f"{location}: {error.message}"
+
+
+def _pydantic_errors(config: dict) -> List[str]:
+    # pylint: disable=import-outside-toplevel
+    sys.path.insert(0, SRC_DIR)
+    from pydantic import ValidationError
+    from schemas import RoDouConfig
+
+    try:
+        RoDouConfig(**config)
+    except ValidationError as e:
+        return [
+            f"{'/'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in e.errors()
+        ]
+    return []
+
+
+def validate_file(filepath: str, full: bool = False) -> ConfigSummary:
+    """Validates a YAML config file against the JSON schema, and also
+    against the pydantic models if `full`."""
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            config = yaml.load(f, Loader=YAML_LOADER)
+    except (OSError, yaml.YAMLError) as e:
+        return ConfigSummary(filepath, None, 0, [f"<arquivo>: {e}"])
+
+    errors = [
+        _error_message(error)
+        for error in sorted(
+            get_validator().iter_errors(config),
+            key=lambda error: [str(part) for part in error.absolute_path],
+        )
+    ]
+    if full and not errors:
+        errors = _pydantic_errors(config)
+
+    dag = config.get("dag") if isinstance(config, dict) else None
+    dag = dag if isinstance(dag, dict) else {}
+    search = dag.get("search", [])
+    num_searches = len(search) if isinstance(search, list) else 1
+    return ConfigSummary(filepath, dag.get("id"), num_searches, errors)
+
+
+def _validate_chunk(filepaths: List[str], full: bool) -> List[ConfigSummary]:
+    return [validate_file(filepath, full) for filepath in filepaths]
+
+
+def validate_files(
+    filepaths: Iterable[str], full: bool = False, workers: Optional[int] = None
+) -> List[ConfigSummary]:
+    """Validates many config files, in parallel processes for large
+    batches, and flags the DAG ids used by more than one file.
+    """
+    filepaths = list(filepaths)
+    if len(filepaths) < MIN_PARALLEL_FILES or workers == 1:
+        summaries = _validate_chunk(filepaths, full)
+    else:
+        workers = workers or os.cpu_count() or 1
+        chunk_size = max(1, len(filepaths) // (workers * 4))
+        chunks = [
+            filepaths[i : i + chunk_size]
+            for i in range(0, len(filepaths), chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            summaries = [
+                summary
+                for chunk_summaries in executor.map(
+                    _validate_chunk, chunks, [full] * len(chunks)
+                )
+                for summary in chunk_summaries
+            ]
+
+    files_by_dag_id = {}
+    for summary in summaries:
+        if summary.dag_id is not None:
+            files_by_dag_id.setdefault(summary.dag_id, []).append(summary.filepath)
+    for summary in summaries:
+        duplicates = [
+            other
+            for other in files_by_dag_id.get(summary.dag_id, [])
+            if other != summary.filepath
+        ]
+        if duplicates:
+            summary.errors.append(
+                f"dag/id: `{summary.dag_id}` também é usado em {', '.join(duplicates)}"
+            )
+    return summaries
+
+
+def find_config_files(directories: Iterable[str]) -> List[str]:
+    """Lists the YAML files inside `directories`, recursively."""
+    return sorted(
+        filepath
+        for directory in directories
+        for pattern in ("**/*.yaml", "**/*.yml")
+        for filepath in glob.glob(os.path.join(directory, pattern), recursive=True)
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        description="Validates the Ro-DOU YAML config files."
+    )
+    arg_parser.add_argument("directories", nargs="+")
+    arg_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="also validate with the pydantic models",
+    )
+    arg_parser.add_argument("--workers", type=int, default=None)
+    args = arg_parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summaries = validate_files(
+        find_config_files(args.directories), full=args.full, workers=args.workers
+    )
+    elapsed = time.perf_counter() - start
+
+    invalid = [summary for summary in summaries if not summary.is_valid]
+    for summary in invalid:
+        print(summary.filepath)
+        for error in summary.errors:
+            print(f"  {error}")
+    print(
+        f"{len(summaries)} files validated in {elapsed:.2f}s, "
+        f"{len(invalid)} invalid."
+    )
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
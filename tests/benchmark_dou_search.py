@@ -0,0 +1,110 @@
+"""Benchmark of the DOU search pipeline against the local fake portal.
+
+Runs `DOUSearcher` over a list of synthetic terms served by
+`FakeInGovBrServer` and reports terms/second, pages/second and the p50
+and p95 latency of each term search. No request leaves the machine, so
+concurrency, caching and parsing changes can be compared safely.
+
+Usage (inside the Airflow container):
+
+    cd /opt/airflow/tests/
+    python benchmark_dou_search.py --terms 50 --pages 3 --latency 0.05
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from fake_in_gov_br import FakeInGovBrServer
+from dags.ro_dou_src.hooks.dou_hook import DOUHook
+from dags.ro_dou_src.searchers import DOUSearcher
+from dags.ro_dou_src.utils.circuit_breaker import CircuitBreaker
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_benchmark(
+    num_terms: int,
+    num_pages: int,
+    latency: float,
+    jitter: float,
+    error_rate: float,
+) -> dict:
+    terms = [f"termo de busca {i}" for i in range(num_terms)]
+
+    with FakeInGovBrServer(
+        default_pages=num_pages,
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+        seed=42,
+    ) as server:
+        original_url = DOUHook.IN_API_BASE_URL
+        DOUHook.IN_API_BASE_URL = server.search_url
+        searcher = DOUSearcher()
+        searcher.SCRAPPING_INTERVAL = 0
+        searcher.RETRY_INTERVAL = 0
+        searcher.circuit_breaker = CircuitBreaker(
+            "benchmark", failure_threshold=num_terms * 10, state_dir=tempfile.mkdtemp()
+        )
+        latencies = []
+        start = time.perf_counter()
+        try:
+            for term in terms:
+                term_start = time.perf_counter()
+                searcher._search_all_terms(
+                    term_list=[term],
+                    dou_sections=["TODOS"],
+                    search_date="DIA",
+                    trigger_date=datetime(2024, 4, 1),
+                    field="TUDO",
+                    is_exact_search=True,
+                    ignore_signature_match=False,
+                    force_rematch=False,
+                    department=None,
+                )
+                latencies.append(time.perf_counter() - term_start)
+        finally:
+            DOUHook.IN_API_BASE_URL = original_url
+        elapsed = time.perf_counter() - start
+
+        return {
+            "terms": num_terms,
+            "requests": server.requests_count,
+            "errors": server.errors_count,
+            "elapsed_s": elapsed,
+            "terms_per_s": num_terms / elapsed,
+            "pages_per_s": server.requests_count / elapsed,
+            "p50_term_latency_s": statistics.median(latencies),
+            "p95_term_latency_s": percentile(latencies, 95),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terms", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=3, help="pages per term")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        args.terms, args.pages, args.latency, args.jitter, args.error_rate
+    )
+    for key, value in report.items():
+        print(f"{key:>20}: {value:.3f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+
+if __name__ == "__main__":
+    main()
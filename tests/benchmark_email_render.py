@@ -0,0 +1,90 @@
+"""Benchmark of the HTML rendering of the email reports.
+
+Renders with `EmailSender.generate_email_content` a synthetic report with
+`--results` matches spread over terms, groups and departments, and
+reports the p50 render time, results/second and the size of the HTML.
+Nothing is sent.
+
+Usage (inside the Airflow container):
+
+    cd /opt/airflow/tests/
+    python benchmark_email_render.py --results 10000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from dags.ro_dou_src.notification.email_sender import EmailSender
+
+
+def build_report(num_results: int, terms_per_group: int = 20) -> list:
+    """A search report with `num_results` matches, in two groups of
+    `terms_per_group` terms, each with two departments."""
+    result = {}
+    for i in range(num_results):
+        term_index = i % (terms_per_group * 2)
+        group = result.setdefault(f"Grupo {term_index % 2}", {})
+        term = group.setdefault(f"termo de busca {term_index}", {})
+        department = term.setdefault(f"Ministério {i % 2}", [])
+        department.append(
+            {
+                "section": "DOU - Seção 2",
+                "title": f"PORTARIA Nº {i}, DE 1 DE ABRIL DE 2024",
+                "href": f"https://www.in.gov.br/web/dou/-/portaria-n-{i}",
+                "abstract": (
+                    "O SECRETÁRIO, no uso das atribuições, resolve nomear "
+                    f"<span class='highlight' style='background:#FFA;'>termo de "
+                    f"busca {term_index}</span> para exercer o cargo em comissão "
+                    "de Coordenador, código FCE 1.10, da Secretaria de Gestão."
+                ),
+                "date": "01/04/2024",
+            }
+        )
+    return [{"header": "Benchmark", "department": None, "result": result}]
+
+
+def run_benchmark(num_results: int, repeat: int, hide_filters: bool) -> dict:
+    sender = EmailSender(
+        SimpleNamespace(
+            header_text="<p>Cabeçalho</p>",
+            footer_text="<p>Rodapé</p>",
+            hide_filters=hide_filters,
+            no_results_found_text="Nenhum resultado",
+        )
+    )
+    sender.search_report = build_report(num_results)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        content = sender.generate_email_content()
+        timings.append(time.perf_counter() - start)
+
+    render_s = statistics.median(timings)
+    return {
+        "results": num_results,
+        "p50_render_s": render_s,
+        "results_per_s": num_results / render_s,
+        "html_kb": len(content.encode("utf-8")) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--results", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--hide-filters", action="store_true")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.results, args.repeat, args.hide_filters)
+    for key, value in report.items():
+        print(f"{key:>20}: {value:.3f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+
+if __name__ == "__main__":
+    main()
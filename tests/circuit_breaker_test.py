@@ -0,0 +1,88 @@
+"""Circuit breaker and search checkpoint unit tests
+"""
+
+import pytest
+
+from dags.ro_dou_src.utils.checkpoint import SearchCheckpoint
+from dags.ro_dou_src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture()
+def circuit_breaker(tmp_path) -> CircuitBreaker:
+    return CircuitBreaker(
+        "test_source", failure_threshold=3, reset_timeout=600, state_dir=str(tmp_path)
+    )
+
+
+def test_circuit_breaker__opens_after_threshold(circuit_breaker):
+    for _ in range(2):
+        circuit_breaker.record_failure()
+    circuit_breaker.check()
+
+    circuit_breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.check()
+
+
+def test_circuit_breaker__success_resets_failures(circuit_breaker):
+    for _ in range(2):
+        circuit_breaker.record_failure()
+    circuit_breaker.record_success()
+    circuit_breaker.record_failure()
+
+    assert not circuit_breaker.is_open
+
+
+def test_circuit_breaker__state_is_shared(circuit_breaker, tmp_path):
+    for _ in range(3):
+        circuit_breaker.record_failure()
+    other = CircuitBreaker("test_source", failure_threshold=3, state_dir=str(tmp_path))
+
+    assert other.is_open
+
+
+def test_circuit_breaker__half_open_after_timeout(tmp_path):
+    circuit_breaker = CircuitBreaker(
+        "test_source", failure_threshold=1, reset_timeout=0, state_dir=str(tmp_path)
+    )
+    circuit_breaker.record_failure()
+
+    circuit_breaker.check()
+    circuit_breaker.record_success()
+
+    assert not circuit_breaker.is_open
+
+
+def test_circuit_breaker__is_open_keeps_trial_request(tmp_path):
+    circuit_breaker = CircuitBreaker(
+        "test_source", failure_threshold=1, reset_timeout=0, state_dir=str(tmp_path)
+    )
+    circuit_breaker.record_failure()
+    with open(circuit_breaker.state_path, encoding="utf-8") as f:
+        state = f.read()
+
+    assert not circuit_breaker.is_open
+    with open(circuit_breaker.state_path, encoding="utf-8") as f:
+        assert f.read() == state
+
+
+def test_search_checkpoint__survives_new_instance(tmp_path):
+    checkpoint = SearchCheckpoint("dag", "run", "task", base_dir=str(tmp_path))
+    checkpoint.put("lgpd", [{"title": "Portaria"}])
+    checkpoint.put("dados abertos", [])
+
+    retried = SearchCheckpoint("dag", "run", "task", base_dir=str(tmp_path))
+
+    assert retried.get("lgpd") == [{"title": "Portaria"}]
+    assert retried.get("dados abertos") == []
+    assert retried.get("governo aberto") is None
+
+
+def test_search_checkpoint__clear(tmp_path):
+    checkpoint = SearchCheckpoint("dag", "run", "task", base_dir=str(tmp_path))
+    checkpoint.put("lgpd", [])
+    checkpoint.clear()
+
+    assert SearchCheckpoint("dag", "run", "task", base_dir=str(tmp_path)).get(
+        "lgpd"
+    ) is None
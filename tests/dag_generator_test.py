@@ -3,8 +3,14 @@
 
 import pandas as pd
 import pytest
-from dags.ro_dou_src.dou_dag_generator import merge_results
+from dags.ro_dou_src.dou_dag_generator import (
+    chunk_term_list,
+    fetch_columns,
+    merge_results,
+)
 from dags.ro_dou_src.notification.email_sender import EmailSender, repack_match
+from dags.ro_dou_src.schemas import ReportConfig
+from dags.ro_dou_src.utils.checkpoint import SearchCheckpoint
 from airflow import Dataset
 from airflow.timetables.datasets import DatasetOrTimeSchedule
 
@@ -29,11 +35,33 @@ def test_repack_match(report_example):
 
 @pytest.fixture
 def email_sender(report_example):
-    email_sender = EmailSender(None)
+    email_sender = EmailSender(ReportConfig())
     email_sender.search_report = report_example
     return email_sender
 
 
+@pytest.mark.parametrize("hide_filters", [False, True])
+def test_generate_email_content(email_sender, hide_filters):
+    email_sender.report_config = ReportConfig(
+        header_text="<p>Cabeçalho</p>",
+        footer_text="<p>Rodapé</p>",
+        hide_filters=hide_filters,
+        no_results_found_text="Nenhum",
+    )
+    match = email_sender.search_report[0]["result"]["single_group"][
+        "antonio de oliveira"
+    ]["single_department"][0]
+
+    content = email_sender.generate_email_content()
+
+    assert content.startswith("<style>")
+    assert content.rstrip().endswith("<hr />\n<p>Rodapé</p>")
+    assert f'<h3><a href="{match["href"]}">{match["title"]}</a></h3>' in content
+    assert match["abstract"] in content
+    assert ("Resultados para: antonio de oliveira" in content) is not hide_filters
+    assert content.count("<ul>") == content.count("</ul>")
+
+
 def test_convert_report_dict__returns_list(email_sender):
     tuple_list = email_sender.convert_report_dict_to_tuple_list()
     assert isinstance(tuple_list, list)
@@ -51,14 +79,19 @@ def test_convert_report_dict__returns_tuples_of_nine(email_sender):
         assert len(tpl) == 9
 
 
-def test_convert_report_to_dataframe__rows_count(email_sender):
-    df = email_sender.convert_report_to_dataframe()
+def _read_csv_attachment(email_sender) -> pd.DataFrame:
+    with email_sender.get_csv_tempfile() as csv_file:
+        return pd.read_csv(csv_file.name)
+
+
+def test_get_csv_tempfile__rows_count(email_sender):
+    df = _read_csv_attachment(email_sender)
     # num_rows
     assert df.shape[0] == 15
 
 
-def test_convert_report_to_dataframe__cols_single_group(email_sender):
-    df = email_sender.convert_report_to_dataframe()
+def test_get_csv_tempfile__cols_single_group(email_sender):
+    df = _read_csv_attachment(email_sender)
     assert tuple(df.columns) == (
         "Consulta",
         "Termo de pesquisa",
@@ -70,12 +103,12 @@ def test_convert_report_to_dataframe__cols_single_group(email_sender):
     )
 
 
-def test_convert_report_to_dataframe__cols_grouped_report(email_sender, report_example):
+def test_get_csv_tempfile__cols_grouped_report(email_sender, report_example):
     report_example[0]["result"]["group_name_different_of_single_group"] = (
         report_example[0]["result"].pop("single_group")
     )
     email_sender.search_report = report_example
-    df = email_sender.convert_report_to_dataframe()
+    df = _read_csv_attachment(email_sender)
     assert tuple(df.columns) == (
         "Consulta",
         "Grupo",
@@ -103,6 +136,23 @@ def test_get_csv_tempfile__valid_csv(email_sender):
         assert pd.read_csv(csv_file.name) is not None
 
 
+@pytest.mark.parametrize(
+    "compression, suffix",
+    [("gzip", ".csv.gz"), ("zip", ".zip")],
+)
+def test_get_csv_tempfile__compressed(email_sender, compression, suffix):
+    with email_sender.get_csv_tempfile() as csv_file:
+        expected = pd.read_csv(csv_file.name)
+    email_sender.report_config = ReportConfig(csv_compression=compression)
+
+    with email_sender.get_csv_tempfile() as csv_file:
+        assert csv_file.name.endswith(suffix)
+        df = pd.read_csv(csv_file.name, compression=compression)
+
+    pd.testing.assert_frame_equal(df, expected)
+    assert df.shape[0] == 15
+
+
 def test_merge_results(merge_results_samples):
     merged_result = merge_results(
         merge_results_samples[0],
@@ -125,6 +175,17 @@ def test_hash_dag_id(dag_gen, dag_id, size, hashed):
     assert dag_gen._hash_dag_id(dag_id, size) == hashed
 
 
+def test_get_safe_schedule__spread_minute(dag_gen, mocker, monkeypatch):
+    monkeypatch.setattr(dag_gen, "_schedule_minutes", {"spread_dag": 42})
+    specs = mocker.MagicMock(id="spread_dag")
+    other_specs = mocker.MagicMock(id="other_dag")
+
+    assert dag_gen._get_safe_schedule(specs, "0 5 * * *") == "42 5 * * *"
+    assert dag_gen._get_safe_schedule(other_specs, "0 5 * * *") == (
+        f"{dag_gen._hash_dag_id('other_dag', 60)} 5 * * *"
+    )
+
+
 @pytest.mark.parametrize(
     "dataset, schedule, is_default_schedule",
     [
@@ -142,3 +203,244 @@ def test_update_schedule_with_dataset(dag_gen, dataset, schedule, is_default_sch
         assert isinstance(schedule[0], Dataset)
     else:
         assert isinstance(schedule, DatasetOrTimeSchedule)
+
+
+@pytest.mark.parametrize(
+    "config_file, search_task_ids",
+    [
+        (
+            "multiple_searchs_example.yaml",
+            [
+                "exec_searchs.exec_search_1",
+                "exec_searchs.exec_search_2",
+                "exec_searchs.exec_search_3",
+            ],
+        ),
+        ("compact_execution_example.yaml", ["exec_searchs.exec_search_all"]),
+    ],
+)
+def test_create_dag__search_tasks(dag_gen, config_file, search_task_ids):
+    specs = dag_gen.parser(
+        f"{dag_gen.YAMLS_DIR}/examples_and_tests/{config_file}"
+    ).parse()
+    dag = dag_gen.create_dag(specs, config_file)
+
+    search_tasks = [
+        task_id for task_id in dag.task_ids if task_id.startswith("exec_searchs.")
+    ]
+    assert search_tasks == search_task_ids
+    assert dag.get_task("has_matches").op_kwargs["search_task_ids"] == search_task_ids
+
+
+def test_perform_all_searches__resumes_finished_subsearches(
+    dag_gen, mocker, monkeypatch, tmp_path
+):
+    monkeypatch.setenv("RO_DOU__CHECKPOINT_DIR", str(tmp_path))
+    context = {
+        "ti": mocker.MagicMock(dag_id="dag", task_id="exec_search_all", map_index=-1),
+        "run_id": "run",
+    }
+    searches = [{"header": "A"}, {"header": "B"}]
+    result_a = {"header": "A", "result": {}}
+    result_b = {"header": "B", "result": {}}
+    perform_searches = mocker.patch.object(
+        dag_gen,
+        "perform_searches",
+        side_effect=[result_a, Exception("timeout"), result_b],
+    )
+
+    with pytest.raises(Exception, match="timeout"):
+        dag_gen.perform_all_searches(searches, **context)
+    results = dag_gen.perform_all_searches(searches, **context)
+
+    assert results == [result_a, result_b]
+    assert perform_searches.call_count == 3
+    assert perform_searches.call_args.kwargs["checkpoint_suffix"] == "__2"
+
+
+def test_run_sources__isolates_failures(dag_gen, mocker, tmp_path):
+    finished = SearchCheckpoint("dag", "run", "task__sources", base_dir=str(tmp_path))
+    dou_result = {"single_group": {"term": {"single_department": [{"href": "1"}]}}}
+    dou_search = mocker.Mock(return_value=dou_result)
+    qd_search = mocker.Mock(side_effect=ConnectionError("QD fora do ar"))
+
+    with pytest.raises(ConnectionError):
+        dag_gen._run_sources({"DOU": dou_search, "QD": qd_search}, finished)
+
+    qd_search.side_effect = None
+    qd_search.return_value = {"single_group": {}}
+    results = dag_gen._run_sources({"DOU": dou_search, "QD": qd_search}, finished)
+
+    assert results == {"DOU": dou_result, "QD": {"single_group": {}}}
+    assert dou_search.call_count == 1
+    assert qd_search.call_count == 2
+
+
+def test_harvest_dou__paces_requests(dag_gen, mocker, monkeypatch, tmp_path):
+    monkeypatch.setenv("RO_DOU__HARVEST_DIR", str(tmp_path))
+    dou_searcher = mocker.Mock(SCRAPPING_INTERVAL=1)
+    dou_searcher.fetch_term.return_value = [{"href": "1"}]
+    mocker.patch.object(dag_gen, "_searchers", {"DOU": dou_searcher})
+    sleep = mocker.patch("dags.ro_dou_src.dou_dag_generator.time.sleep")
+    targets = [
+        {
+            "search_term": term,
+            "dou_sections": ["TODOS"],
+            "search_date": "DIA",
+            "field": "TUDO",
+            "is_exact_search": True,
+        }
+        for term in ("lgpd", "licitação", "pregão")
+    ]
+
+    dag_run = mocker.Mock(external_trigger=True, conf={"trigger_date": "2024-04-01"})
+
+    dag_gen.harvest_dou(targets, dag_run=dag_run)
+
+    assert dou_searcher.fetch_term.call_count == 3
+    assert sleep.call_count == 2
+
+
+def test_generate_dags__harvest_skips_broken_configs(dag_gen, mocker, monkeypatch):
+    monkeypatch.setattr(dag_gen, "HARVEST_ENABLED", True)
+    mocker.patch.object(
+        dag_gen, "_list_config_files", return_value=["good.yaml", "broken.yaml"]
+    )
+    good_specs = mocker.MagicMock()
+    parsers = {
+        "good.yaml": mocker.Mock(parse=mocker.Mock(return_value=good_specs)),
+        "broken.yaml": mocker.Mock(parse=mocker.Mock(side_effect=ValueError("bad"))),
+    }
+    monkeypatch.setattr(dag_gen, "parser", parsers.get)
+    mocker.patch(
+        "dags.ro_dou_src.dou_dag_generator.uses_harvest", return_value=True
+    )
+    create_harvest_dag = mocker.patch.object(
+        dag_gen, "create_harvest_dag", return_value="harvest_dag"
+    )
+    target_globals = {}
+
+    dag_gen.generate_dags(harvest=True, target_globals=target_globals)
+
+    create_harvest_dag.assert_called_once_with([good_specs])
+    assert target_globals == {"ro-dou_dou_harvest": "harvest_dag"}
+
+
+def test_get_xcom_pull_tasks__flattens_compact_results(dag_gen, mocker):
+    ti = mocker.MagicMock()
+    ti.xcom_pull.side_effect = [{"header": "A"}, [{"header": "B"}, {"header": "C"}]]
+
+    search_results = dag_gen.get_xcom_pull_tasks(
+        search_task_ids=["exec_searchs.exec_search_1", "exec_searchs.exec_search_all"],
+        ti=ti,
+    )
+
+    assert [result["header"] for result in search_results] == ["A", "B", "C"]
+
+
+def test_chunk_term_list__list():
+    chunks = chunk_term_list(["a", "b", "c"], 2, {"header": "H"})
+
+    assert chunks == [
+        {"header": "H", "term_list": {"terms": ["a", "b"], "groups": None}},
+        {"header": "H", "term_list": {"terms": ["c"], "groups": None}},
+    ]
+
+
+def test_chunk_term_list__terms_from_db(term_n_group):
+    chunks = chunk_term_list(term_n_group, 1, {})
+
+    assert [chunk["term_list"] for chunk in chunks] == [
+        {"terms": ["ANTONIO DE OLIVEIRA"], "groups": ["EPPGG"]},
+        {"terms": ["SILVA"], "groups": ["ATI"]},
+    ]
+
+
+def test_chunk_term_list__empty():
+    assert chunk_term_list([], 10, {}) == [{"term_list": {"terms": [], "groups": None}}]
+
+
+def _fake_db_hook(mocker, rows):
+    cursor = mocker.MagicMock()
+    cursor.fetchmany.side_effect = lambda size: [
+        rows.pop(0) for _ in range(min(size, len(rows)))
+    ]
+    db_hook = mocker.MagicMock()
+    db_hook.get_conn.return_value.cursor.return_value = cursor
+    return db_hook
+
+
+def test_fetch_columns__batches(mocker, monkeypatch):
+    monkeypatch.setattr(
+        "dags.ro_dou_src.dou_dag_generator.TERMS_FETCH_BATCH_SIZE", 2
+    )
+    db_hook = _fake_db_hook(mocker, [("a", "x"), ("b", "y"), ("c", "z")])
+
+    columns = fetch_columns(db_hook, "SELECT 1", server_side=True)
+
+    assert [list(column) for column in columns] == [["a", "b", "c"], ["x", "y", "z"]]
+    db_hook.get_conn.return_value.cursor.assert_called_once_with("ro_dou_terms")
+    db_hook.get_conn.return_value.close.assert_called_once()
+
+
+def test_select_terms_from_db__cleans_terms(dag_gen, mocker):
+    mocker.patch(
+        "dags.ro_dou_src.dou_dag_generator.BaseHook.get_connection"
+    ).return_value.conn_type = "postgres"
+    mocker.patch(
+        "airflow.providers.postgres.hooks.postgres.PostgresHook"
+    ).return_value = _fake_db_hook(mocker, [(" SILVA ", "ATI"), ("SOUZA", None)])
+
+    term_list = dag_gen.select_terms_from_db(sql="SELECT 1", conn_id="db")
+
+    assert term_list == {"terms": ["SILVA", "SOUZA"], "groups": ["ATI", ""]}
+
+
+def test_create_dag__chunked_search(dag_gen):
+    specs = dag_gen.parser(
+        f"{dag_gen.YAMLS_DIR}/examples_and_tests/chunked_terms_example.yaml"
+    ).parse()
+    dag = dag_gen.create_dag(specs, "chunked_terms_example.yaml")
+
+    merge_task = dag.get_task("exec_searchs.exec_search_1")
+    assert merge_task.upstream_task_ids == {"exec_searchs.exec_search_1_chunks"}
+    assert dag.get_task("exec_searchs.chunk_terms_1").upstream_task_ids == {
+        "exec_searchs.select_terms_from_db_1"
+    }
+
+
+def test_has_matches__uses_summary(dag_gen, mocker):
+    ti = mocker.MagicMock()
+    ti.xcom_pull.side_effect = lambda task_ids, key="return_value": (
+        [{"header": "H", "has_matches": False, "num_results": 0}]
+        if key == "summary"
+        else pytest.fail("the results should not be pulled")
+    )
+
+    branch = dag_gen.has_matches(
+        search_task_ids=["exec_searchs.exec_search_1"], skip_null=True, ti=ti
+    )
+
+    assert branch == "skip_notification"
+
+
+def test_publish_result__summary_and_store(dag_gen, mocker, monkeypatch, tmp_path):
+    monkeypatch.setenv("RO_DOU__RESULT_STORE_DIR", str(tmp_path))
+    search = {
+        "result": {"single_group": {"term": {"dpt": [{}, {}], "other dpt": [{}]}}},
+        "header": "H",
+        "department": None,
+    }
+    ti = mocker.MagicMock(dag_id="dag", task_id="exec_searchs.exec_search_1", map_index=-1)
+
+    reference = dag_gen._publish_result(search, ti=ti, run_id="run")
+    ti.xcom_pull.return_value = reference
+
+    summary = ti.xcom_push.call_args.kwargs["value"]
+    assert ti.xcom_push.call_args.kwargs["key"] == "summary"
+    assert summary[0]["num_results"] == 3
+    assert summary[0]["counts"] == {"single_group": {"term": {"dpt": 2, "other dpt": 1}}}
+    assert reference["summary"] == summary
+    assert dag_gen.get_xcom_pull_tasks(
+        search_task_ids=["exec_searchs.exec_search_1"], ti=ti
+    ) == [search]
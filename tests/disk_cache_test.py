@@ -0,0 +1,50 @@
+"""DiskCache unit tests
+"""
+
+import os
+import time
+
+import pytest
+
+from dags.ro_dou_src.utils.disk_cache import DiskCache
+
+
+@pytest.fixture()
+def disk_cache(tmp_path) -> DiskCache:
+    return DiskCache("test", max_entries=3, base_dir=str(tmp_path))
+
+
+def test_get__miss_and_hit(disk_cache):
+    assert disk_cache.get("key") is None
+    disk_cache.set("key", {"value": [1, 2]})
+
+    assert disk_cache.get("key") == {"value": [1, 2]}
+    assert (disk_cache.hits, disk_cache.misses) == (1, 1)
+
+
+def test_get__expired_entry(disk_cache):
+    disk_cache.set("key", "value", ttl=-1)
+
+    assert disk_cache.get("key", "default") == "default"
+
+
+def test_get__shared_between_instances(disk_cache, tmp_path):
+    disk_cache.set("key", "value")
+
+    assert DiskCache("test", base_dir=str(tmp_path)).get("key") == "value"
+
+
+def test_evict__least_recently_used(disk_cache):
+    for i in range(5):
+        disk_cache.set(f"key_{i}", i)
+        # mtime resolution may be coarse on some filesystems
+        past = time.time() - 100 + i
+        os.utime(disk_cache._entry_path(f"key_{i}"), (past, past))
+    disk_cache.get("key_0")
+
+    disk_cache.evict()
+
+    assert disk_cache.get("key_0") == 0
+    assert disk_cache.get("key_1") is None
+    assert disk_cache.get("key_2") is None
+    assert disk_cache.get("key_4") == 4
@@ -0,0 +1,60 @@
+"""DOUHook tests against the local fake in.gov.br portal
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# enums must come from the hook module to match the ones it compares with
+from dags.ro_dou_src.hooks.dou_hook import DOUHook, Field, SearchDate, Section
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from fake_in_gov_br import FakeInGovBrServer, synthetic_pages
+
+
+@pytest.fixture()
+def fake_in_gov_br(monkeypatch):
+    with FakeInGovBrServer(
+        recordings={
+            "uma pagina": synthetic_pages("uma pagina", 1),
+            "duas paginas": synthetic_pages("duas paginas", 2),
+            "cinco paginas": synthetic_pages("cinco paginas", 5),
+        }
+    ) as server:
+        monkeypatch.setattr(DOUHook, "IN_API_BASE_URL", server.search_url)
+        yield server
+
+
+@pytest.mark.parametrize(
+    "search_term, num_pages",
+    [
+        ("uma pagina", 1),
+        ("duas paginas", 2),
+        ("cinco paginas", 5),
+    ],
+)
+def test_search_text__follows_pagination(fake_in_gov_br, search_term, num_pages):
+    results = DOUHook().search_text(
+        search_term=search_term,
+        sections=[Section.TODOS],
+        reference_date=datetime(2024, 4, 1),
+        search_date=SearchDate.DIA,
+        field=Field.TUDO,
+    )
+
+    assert fake_in_gov_br.requests_count == num_pages
+    assert len(results) == num_pages * 20
+    assert len({r["id"] for r in results}) == num_pages * 20
+
+
+def test_search_text__field_prefix(fake_in_gov_br):
+    results = DOUHook().search_text(
+        search_term="uma pagina",
+        sections=[Section.TODOS],
+        reference_date=datetime(2024, 4, 1),
+        field=Field.TITULO,
+    )
+
+    assert len(results) == 20
@@ -0,0 +1,214 @@
+"""Local stand-in for the in.gov.br search portal.
+
+Serves search pages in the same format as
+`https://www.in.gov.br/consulta/-/buscar/dou`, including the pagination
+through the `id`/`displayDate`/`newPage` parameters, so that `DOUHook`
+and `DOUSearcher` can be exercised and benchmarked offline.
+
+The pages are replayed from recordings (JSON files holding
+`{"term": ..., "pages": [[item, ...], ...]}`, where each item is an
+element of the portal `jsonArray`) or synthesized for terms without
+recording. Latency and errors can be injected to mimic the portal under
+load.
+
+Usage:
+
+    with FakeInGovBrServer(latency=0.05, error_rate=0.01) as server:
+        DOUHook.IN_API_BASE_URL = server.search_url
+        ...
+"""
+
+import glob
+import html
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+SEARCH_PATH = "/consulta/-/buscar/dou"
+SCRIPT_TAG_ID = "_br_com_seatecnologia_in_buscadou_BuscaDouPortlet_params"
+PAGE_SIZE = 20
+FIELD_PREFIXES = ("title_pt_BR-", "ddm__text__21040__texto_pt_BR-")
+
+
+def synthetic_pages(
+    term: str, num_pages: int = 1, page_size: int = PAGE_SIZE
+) -> List[List[dict]]:
+    """Builds `num_pages` pages of portal results matching `term`."""
+    pages = []
+    for page_num in range(num_pages):
+        page = []
+        for i in range(page_size):
+            class_pk = 300000000 + page_num * page_size + i
+            page.append(
+                {
+                    "pubName": "DO1",
+                    "title": f"PORTARIA Nº {class_pk}, DE 1º DE ABRIL DE 2024",
+                    "urlTitle": f"portaria-n-{class_pk}-de-1-de-abril-de-2024-{class_pk}",
+                    "content": (
+                        "O MINISTRO DE ESTADO, no uso das atribuições, resolve "
+                        "<span class='highlight' style='background:#FFA;'>"
+                        f"{html.escape(term)}</span> nos termos do processo..."
+                    ),
+                    "pubDate": "01/04/2024",
+                    "classPK": class_pk,
+                    "displayDateSortable": 20240401000000 - page_num * page_size - i,
+                    "hierarchyList": ["Ministério da Gestão e da Inovação"],
+                }
+            )
+        pages.append(page)
+    return pages
+
+
+def load_recordings(recordings_dir: str) -> Dict[str, List[List[dict]]]:
+    """Loads the recorded pages of each term in `recordings_dir`."""
+    recordings = {}
+    for path in glob.glob(os.path.join(recordings_dir, "*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            recording = json.load(f)
+        recordings[recording["term"]] = recording["pages"]
+    return recordings
+
+
+def render_page(items: List[dict], num_pages: int) -> bytes:
+    """Renders a search page like the portal does."""
+    if num_pages > 2:
+        pagination = f'<button id="lastPage">{num_pages}</button>'
+    elif num_pages == 2:
+        pagination = '<button id="2btn">2</button>'
+    else:
+        pagination = ""
+    params = json.dumps({"jsonArray": items}, ensure_ascii=False)
+    return (
+        "<html><body>"
+        f'<script type="application/json" id="{SCRIPT_TAG_ID}">{params}</script>'
+        f"<div class='pagination'>{pagination}</div>"
+        "</body></html>"
+    ).encode("utf-8")
+
+
+class FakeInGovBrServer:
+    """Threaded HTTP server replaying the in.gov.br search.
+
+    Args:
+        recordings (dict, optional): Pages by search term. Terms
+            without recording are answered with `default_pages`
+            synthetic pages.
+        default_pages (int): Number of pages synthesized for terms
+            without recording. Defaults to 1.
+        latency (float): Seconds to wait before answering each request.
+        jitter (float): Random extra latency, up to `jitter` seconds.
+        error_rate (float): Fraction of requests answered with HTTP 503.
+        seed (int, optional): Seed of the error injection.
+    """
+
+    def __init__(
+        self,
+        recordings: Optional[Dict[str, List[List[dict]]]] = None,
+        default_pages: int = 1,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.recordings = recordings or {}
+        self.default_pages = default_pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests_count = 0
+        self.errors_count = 0
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def search_url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}{SEARCH_PATH}"
+
+    def pages_for(self, query: str) -> List[List[dict]]:
+        # `DOUHook` sends the term quoted and prefixed by the field
+        for prefix in FIELD_PREFIXES:
+            if query.startswith(prefix):
+                query = query[len(prefix) :]
+        term = query.strip('"')
+        if term not in self.recordings:
+            self.recordings[term] = synthetic_pages(term, self.default_pages)
+        return self.recordings[term]
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests_count += 1
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors_count += 1
+            return fail
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                pass
+
+            def _reply(self, status: int, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                url = urlparse(self.path)
+                if url.path != SEARCH_PATH:
+                    self._reply(404, b"Not found")
+                    return
+
+                time.sleep(server.latency + server._random.random() * server.jitter)
+                if server._should_fail():
+                    self._reply(503, b"<html><body>Service Unavailable</body></html>")
+                    return
+
+                params = parse_qs(url.query)
+                pages = server.pages_for(params.get("q", [""])[0])
+                page_num = int(params.get("newPage", ["1"])[0])
+
+                if page_num > 1:
+                    # the portal requires the last item of the previous page
+                    previous = pages[page_num - 2][-1]
+                    if params.get("id", [None])[0] != str(
+                        previous["classPK"]
+                    ) or params.get("displayDate", [None])[0] != str(
+                        previous["displayDateSortable"]
+                    ):
+                        self._reply(400, b"<html><body>Bad Request</body></html>")
+                        return
+
+                items = pages[page_num - 1] if page_num <= len(pages) else []
+                self._reply(200, render_page(items, len(pages)))
+
+        return Handler
+
+    def start(self) -> "FakeInGovBrServer":
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> "FakeInGovBrServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,81 @@
+"""DOU harvest unit tests
+"""
+
+from datetime import datetime
+
+import pytest
+
+from dags.ro_dou_src.harvest import (
+    HarvestStore,
+    collect_harvest_targets,
+    harvest_key,
+    uses_harvest,
+)
+from dags.ro_dou_src.schemas import DAGConfig
+
+
+def _dag_config(dag_id: str, search: list, **kwargs) -> DAGConfig:
+    return DAGConfig(
+        id=dag_id,
+        description="DAG de teste",
+        search=search,
+        report={"emails": ["destination@economia.gov.br"]},
+        **kwargs,
+    )
+
+
+def test_harvest_key__ignores_sections_order():
+    assert harvest_key("lgpd", ["SECAO_1", "SECAO_2"], "DIA", "TUDO", True) == (
+        harvest_key("lgpd", ["SECAO_2", "SECAO_1"], "DIA", "TUDO", True)
+    )
+
+
+def test_harvest_key__distinguishes_field():
+    assert harvest_key("lgpd", ["TODOS"], "DIA", "TUDO", True) != (
+        harvest_key("lgpd", ["TODOS"], "DIA", "TITULO", True)
+    )
+
+
+def test_collect_harvest_targets__union_of_terms():
+    specs_list = [
+        _dag_config("dag_1", [{"terms": ["lgpd", "dados abertos"]}]),
+        _dag_config("dag_2", [{"terms": ["lgpd", "governo aberto"]}]),
+        _dag_config("dag_3", [{"terms": ["lgpd"], "sources": ["QD"]}]),
+    ]
+    targets = collect_harvest_targets(specs_list)
+    assert sorted(t["search_term"] for t in targets) == [
+        "dados abertos",
+        "governo aberto",
+        "lgpd",
+    ]
+
+
+@pytest.mark.parametrize(
+    "kwargs, search, expected",
+    [
+        ({}, [{"terms": ["lgpd"]}], True),
+        ({"schedule": "0 8 * * MON-FRI"}, [{"terms": ["lgpd"]}], False),
+        ({"dataset": "inlabs"}, [{"terms": ["lgpd"]}], False),
+        ({}, [{"terms": ["lgpd"], "sources": ["INLABS"]}], False),
+        (
+            {},
+            [{"terms": {"from_db_select": {"sql": "SELECT 1", "conn_id": "db"}}}],
+            False,
+        ),
+    ],
+)
+def test_uses_harvest(kwargs, search, expected):
+    assert uses_harvest(_dag_config("dag", search, **kwargs)) is expected
+
+
+def test_harvest_store__roundtrip(tmp_path):
+    store = HarvestStore(base_dir=str(tmp_path))
+    key = harvest_key("lgpd", ["TODOS"], "DIA", "TUDO", True)
+    reference_date = datetime(2024, 4, 1)
+
+    assert store.get(key, reference_date) is None
+
+    store.put(key, reference_date, [{"title": "Portaria"}])
+
+    assert store.get(key, reference_date) == [{"title": "Portaria"}]
+    assert store.get(key, datetime(2024, 4, 2)) is None
@@ -0,0 +1,74 @@
+"""DAG generator import budget unit tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+# modules used only inside the tasks, which must not be loaded while the
+# scheduler parses the DAG files
+HEAVY_MODULES = [
+    "pandas",
+    "bs4",
+    "html2text",
+    "markdown",
+    "unidecode",
+    "utils.normalization",
+    "searchers",
+    "notification.notifier",
+    "airflow.providers.microsoft.mssql.hooks.mssql",
+    "airflow.providers.postgres.hooks.postgres",
+    "airflow.providers.slack.notifications.slack",
+]
+
+# seconds to import the generator (and build every DAG) once airflow
+# itself is loaded
+IMPORT_TIME_BUDGET = 10.0
+
+IMPORT_SCRIPT = textwrap.dedent(
+    """
+    import json
+    import sys
+    import time
+
+    import airflow.models
+
+    start = time.perf_counter()
+    import dags.ro_dou_src.dou_dag_generator
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+    """
+)
+
+
+@pytest.fixture(scope="module")
+def import_report() -> dict:
+    airflow_home = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        cwd=airflow_home,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", HEAVY_MODULES)
+def test_import__heavy_module_not_loaded(import_report, module):
+    loaded = [
+        name
+        for name in import_report["modules"]
+        if name == module or name.endswith(f".{module}")
+    ]
+
+    assert not loaded
+
+
+def test_import__time_budget(import_report):
+    assert import_report["elapsed"] < IMPORT_TIME_BUDGET
@@ -0,0 +1,70 @@
+"""Text normalization unit tests
+"""
+
+import pytest
+
+from dags.ro_dou_src.utils.normalization import (
+    normalize,
+    normalize_many,
+    normalize_term,
+    strip_accents,
+    strip_accents_aligned,
+)
+
+
+@pytest.mark.parametrize(
+    "raw_text, normalized_text",
+    [
+        ("Nitái Bêzêrrá", "nitai bezerra"),
+        ("Nitái-Bêzêrrá", "nitai-bezerra"),
+        ("Normaliza çedilha", "normaliza cedilha"),
+        ("ìÌÒòùÙúÚáÁÀeççÇÇ~ A", "iioouuuuaaaecccc~ a"),
+        ("a  %&* /  aáá  3d_U", "a %&* / aaa 3d_u"),
+        ("Lei nº 13.709 — LGPD", "lei no 13.709 -- lgpd"),
+        ("tab\tand\nnew line", "tab and new line"),
+        ("", ""),
+    ],
+)
+def test_normalize(raw_text, normalized_text):
+    assert normalize(raw_text) == normalized_text
+
+
+def test_normalize__outside_translation_table():
+    assert normalize("Ωmega 中") == "omega zhong"
+
+
+def test_normalize_many():
+    texts = ["Nitái Bêzêrrá", "a  %&* /  aáá  3d_U", "Ωmega"]
+    assert normalize_many(texts) == [normalize(text) for text in texts]
+
+
+def test_normalize_term__is_memoized():
+    normalize_term.cache_clear()
+    normalize_term("Ministério da Saúde")
+    normalize_term("Ministério da Saúde")
+    assert normalize_term.cache_info().hits == 1
+
+
+@pytest.mark.parametrize(
+    "text_in, text_out",
+    [
+        ("çãAî  é", "caai  e"),
+        ("Seção 1, Nº 10", "secao 1, no 10"),
+        (None, ""),
+    ],
+)
+def test_strip_accents(text_in, text_out):
+    assert strip_accents(text_in) == text_out
+
+
+@pytest.mark.parametrize(
+    "raw_text, folded_text",
+    [
+        ("Ministério da SAÚDE", "ministerio da saude"),
+        ("Lei nº 13.709 — LGPD", "lei no 13.709 — lgpd"),
+        ("Straße Æther", "straße æther"),
+    ],
+)
+def test_strip_accents_aligned(raw_text, folded_text):
+    assert strip_accents_aligned(raw_text) == folded_text
+    assert len(strip_accents_aligned(raw_text)) == len(raw_text)
@@ -0,0 +1,75 @@
+"""Parse-time guard unit tests
+"""
+
+import pytest
+from airflow.hooks.base import BaseHook
+from airflow.models import Variable
+
+from dags.ro_dou_src.notification.failure_notifier import SlackFailureNotifier
+from dags.ro_dou_src.utils.parse_guard import (
+    ParseTimeAccessError,
+    guard_metadata_access,
+)
+
+
+def test_guard__records_accesses(mocker):
+    mocker.patch.object(Variable, "get", return_value="value")
+    mocker.patch.object(BaseHook, "get_connection", return_value="conn")
+
+    with guard_metadata_access() as accesses:
+        assert Variable.get("my_var") == "value"
+        assert BaseHook.get_connection("my_conn") == "conn"
+
+    assert accesses == [("Variable", "my_var"), ("Connection", "my_conn")]
+
+
+def test_guard__strict_raises_and_restores(mocker):
+    get_mock = mocker.patch.object(Variable, "get", return_value="value")
+
+    with pytest.raises(ParseTimeAccessError):
+        with guard_metadata_access(strict=True):
+            Variable.get("my_var")
+
+    assert Variable.get("my_var") == "value"
+    assert get_mock.call_count == 1
+
+
+def test_guard__dag_generation_without_lookups(dag_gen):
+    with guard_metadata_access(strict=True) as accesses:
+        dag_gen.create_dag(
+            dag_gen.parser(
+                f"{dag_gen.YAMLS_DIR}/examples_and_tests/basic_example.yaml"
+            ).parse(),
+            "basic_example.yaml",
+        )
+
+    assert accesses == []
+
+
+def test_failure_notifier__not_configured(mocker):
+    mocker.patch.object(BaseHook, "get_connection", side_effect=Exception("nope"))
+    slack_mock = mocker.patch(
+        "airflow.providers.slack.notifications.slack.SlackNotifier"
+    )
+
+    SlackFailureNotifier("slack_conn")({})
+
+    slack_mock.assert_not_called()
+
+
+def test_failure_notifier__resolved_at_callback(mocker):
+    conn = mocker.MagicMock(description='{"channel": "alerts"}')
+    get_connection = mocker.patch.object(
+        BaseHook, "get_connection", return_value=conn
+    )
+    slack_mock = mocker.patch(
+        "airflow.providers.slack.notifications.slack.SlackNotifier"
+    )
+
+    notifier = SlackFailureNotifier("slack_conn")
+    get_connection.assert_not_called()
+    notifier({"ti": None})
+
+    get_connection.assert_called_once_with("slack_conn")
+    assert slack_mock.call_args.kwargs["channel"] == "alerts"
+    slack_mock.return_value.assert_called_once_with({"ti": None})
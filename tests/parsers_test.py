@@ -11,7 +11,13 @@ import pytest
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
-from dou_dag_generator import DouDigestDagGenerator, YAMLParser, DAGConfig
+from dou_dag_generator import (
+    CachedYAMLParser,
+    DouDigestDagGenerator,
+    YAMLParser,
+    DAGConfig,
+)
+from dags.ro_dou_src.utils.disk_cache import DiskCache
 
 
 @pytest.mark.parametrize(
@@ -588,3 +594,34 @@ def test_parse(filepath, result_tuple):
     parsed = YAMLParser(filepath=filepath).parse()
 
     assert parsed.model_dump() == DAGConfig(**result_tuple).model_dump()
+
+
+def test_cached_parser__reuses_and_invalidates(tmp_path, mocker):
+    source = os.path.join(
+        DouDigestDagGenerator().YAMLS_DIR,
+        "examples_and_tests",
+        "basic_example.yaml",
+    )
+    filepath = tmp_path / "basic_example.yaml"
+    filepath.write_text(open(source, encoding="utf-8").read(), encoding="utf-8")
+    mocker.patch.object(
+        CachedYAMLParser, "cache", DiskCache("dag_configs", base_dir=str(tmp_path))
+    )
+    spy = mocker.spy(YAMLParser, "parse")
+
+    first = CachedYAMLParser(filepath=str(filepath)).parse()
+    second = CachedYAMLParser(filepath=str(filepath)).parse()
+
+    assert spy.call_count == 1
+    assert second.model_dump() == first.model_dump()
+
+    filepath.write_text(
+        filepath.read_text(encoding="utf-8").replace(
+            "basic_example", "basic_example_changed"
+        ),
+        encoding="utf-8",
+    )
+    changed = CachedYAMLParser(filepath=str(filepath)).parse()
+
+    assert spy.call_count == 2
+    assert changed.id == "basic_example_changed"
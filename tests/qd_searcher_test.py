@@ -1,6 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytest
 from dags.ro_dou_src.searchers import QDSearcher, _build_query_payload
+from dags.ro_dou_src.utils.disk_cache import DiskCache
 
 
 @pytest.mark.parametrize(
@@ -79,3 +80,141 @@ def test_build_query_payload(pre_tags: str,
     ]
 
     assert payload == expected
+
+
+def _gazette(num: int) -> dict:
+    return {
+        'date': '2023-02-08',
+        'excerpts': [f'trecho <%%>LGPD</%%> {num}'],
+        'is_extra_edition': False,
+        'state_code': 'PR',
+        'territory_id': '4106902',
+        'territory_name': 'Curitiba',
+        'url': f'https://querido-diario.example/{num}',
+    }
+
+
+@pytest.fixture()
+def qd_searcher(tmp_path) -> QDSearcher:
+    searcher = QDSearcher()
+    searcher.SCRAPPING_INTERVAL = 0
+    searcher._cache = DiskCache('querido_diario', base_dir=str(tmp_path))
+    return searcher
+
+
+def _mock_page_request(mocker, searcher: QDSearcher, total: int):
+    def get(url, params, timeout):
+        offset = dict(params)['offset']
+        size = dict(params)['size']
+        response = mocker.Mock()
+        response.json.return_value = {
+            'total_gazettes': total,
+            'gazettes': [_gazette(n) for n in range(offset, min(offset + size, total))],
+        }
+        return response
+
+    searcher._session = mocker.Mock()
+    searcher._session.get.side_effect = get
+    return searcher._session.get
+
+
+@pytest.mark.parametrize(
+    'total, requests_count',
+    [
+        (0, 1),
+        (100, 1),
+        (101, 2),
+        (350, 4),
+    ])
+def test_search_term__fetches_all_pages(mocker, qd_searcher, total, requests_count):
+    searcher = qd_searcher
+    get = _mock_page_request(mocker, searcher, total)
+
+    results = searcher._search_term(
+        territory_id=None,
+        search_term='LGPD',
+        reference_date=datetime(2023, 2, 8),
+        force_rematch=True,
+    )
+
+    assert get.call_count == requests_count
+    assert [r['href'] for r in results] == [
+        f'https://querido-diario.example/{n}' for n in range(total)
+    ]
+
+
+@pytest.mark.parametrize(
+    'territory_id, territory_ids',
+    [
+        (None, []),
+        (4106902, [4106902]),
+        ('4106902', [4106902]),
+        ([4106902, 3106200], [4106902, 3106200]),
+    ])
+def test_resolve_territory_ids(territory_id, territory_ids):
+    assert QDSearcher._resolve_territory_ids(territory_id) == territory_ids
+
+
+def test_search_term__multiple_territories_in_one_query(mocker, qd_searcher):
+    searcher = qd_searcher
+    get = _mock_page_request(mocker, searcher, 1)
+
+    searcher._search_term(
+        territory_id=[4106902, 3106200],
+        search_term='LGPD',
+        reference_date=datetime(2023, 2, 8),
+        force_rematch=True,
+    )
+
+    params = get.call_args.kwargs['params']
+    assert get.call_count == 1
+    assert [v for k, v in params if k == 'territory_ids'] == [4106902, 3106200]
+
+
+def test_group_by_territory():
+    curitiba = {'title': 'Município de Curitiba - PR'}
+    bh = {'title': 'Município de Belo Horizonte - MG'}
+    grouped = QDSearcher._group_by_territory(
+        {'single_group': {'LGPD': {'single_department': [curitiba, bh, curitiba]}}}
+    )
+
+    assert grouped == {
+        'single_group': {
+            'LGPD': {
+                'Município de Belo Horizonte - MG': [bh],
+                'Município de Curitiba - PR': [curitiba, curitiba],
+            }
+        }
+    }
+
+
+def test_search_term__cached_response(mocker, qd_searcher):
+    get = _mock_page_request(mocker, qd_searcher, 150)
+    search = {
+        'territory_id': [4106902],
+        'search_term': 'LGPD',
+        'reference_date': datetime(2023, 2, 8),
+        'force_rematch': True,
+    }
+
+    first = qd_searcher._search_term(**search)
+    second = qd_searcher._search_term(**search)
+
+    assert get.call_count == 2
+    assert first == second
+    assert (qd_searcher.cache.hits, qd_searcher.cache.misses) == (1, 1)
+
+
+@pytest.mark.parametrize(
+    'days_ago, results, ttl',
+    [
+        (1, [{'href': '1'}], QDSearcher.CACHE_TTL_RECENT_DATE),
+        (1, [], QDSearcher.CACHE_TTL_RECENT_DATE),
+        (QDSearcher.INGESTION_WINDOW_DAYS, [], QDSearcher.CACHE_TTL_RECENT_DATE),
+        (30, [], QDSearcher.CACHE_TTL_EMPTY),
+        (30, [{'href': '1'}], None),
+    ])
+def test_cache_ttl__ingestion_window(qd_searcher, days_ago, results, ttl):
+    reference_date = datetime.now() - timedelta(days=days_ago)
+
+    assert qd_searcher._cache_ttl(reference_date, results) == ttl
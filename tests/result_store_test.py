@@ -0,0 +1,59 @@
+"""ResultStore unit tests
+"""
+
+import os
+import time
+
+import pytest
+
+from dags.ro_dou_src.utils.result_store import ResultStore, is_reference
+
+
+@pytest.fixture()
+def context(mocker) -> dict:
+    return {
+        "ti": mocker.MagicMock(dag_id="dag", task_id="exec_searchs.exec_search_1", map_index=-1),
+        "run_id": "scheduled__2024-04-01T05:00:00+00:00",
+    }
+
+
+def test_put_and_load(tmp_path, context, search_results):
+    store = ResultStore(str(tmp_path))
+
+    reference = store.put(search_results, {"num_results": 1}, **context)
+
+    assert is_reference(reference)
+    assert reference["summary"] == {"num_results": 1}
+    assert reference["result_store_path"].endswith(".json.gz")
+    assert ResultStore.load(reference) == search_results
+
+
+def test_put__mapped_task_instances(tmp_path, context):
+    store = ResultStore(str(tmp_path))
+    context["ti"].map_index = 3
+
+    reference = store.put({}, {}, **context)
+
+    assert reference["result_store_path"].endswith("exec_searchs.exec_search_1_3.json.gz")
+
+
+def test_purge__old_runs(tmp_path, context):
+    store = ResultStore(str(tmp_path), retention_days=1)
+    old_run = tmp_path / "dag" / "old_run"
+    old_run.mkdir(parents=True)
+    two_days_ago = time.time() - 2 * 86400
+    os.utime(old_run, (two_days_ago, two_days_ago))
+
+    store.put({}, {}, **context)
+
+    assert sorted(os.listdir(tmp_path / "dag")) == [
+        "scheduled__2024-04-01T05_00_00_00_00"
+    ]
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("RO_DOU__RESULT_STORE_DIR", raising=False)
+    assert ResultStore.from_env() is None
+
+    monkeypatch.setenv("RO_DOU__RESULT_STORE_DIR", str(tmp_path))
+    assert ResultStore.from_env().base_dir == str(tmp_path)
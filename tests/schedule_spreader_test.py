@@ -0,0 +1,131 @@
+"""Schedule spreader unit tests
+"""
+
+import json
+
+import pytest
+
+from dags.ro_dou_src.schedule_spreader import (
+    ScheduledDag,
+    ScheduleSpreader,
+    load_plan,
+    load_runtimes,
+    parse_budgets,
+    plan_schedules,
+    read_scheduled_dag,
+)
+
+
+@pytest.mark.parametrize(
+    "value, budgets",
+    [
+        (None, {"*": 1}),
+        ("3", {"*": 3}),
+        ("DOU=2, QD=4", {"*": 1, "DOU": 2, "QD": 4}),
+        ("DOU=2,*=3", {"*": 3, "DOU": 2}),
+    ],
+)
+def test_parse_budgets(value, budgets):
+    assert parse_budgets(value) == budgets
+
+
+def test_parse_budgets__invalid():
+    with pytest.raises(ValueError):
+        parse_budgets("DOU=0")
+
+
+def test_assign__similar_ids_do_not_collide():
+    dags = [ScheduledDag(f"dou_dag_{i:02d}", ["DOU"]) for i in range(60)]
+
+    minutes = ScheduleSpreader({"*": 1}).assign(dags)
+
+    assert sorted(minutes.values()) == list(range(60))
+
+
+def test_assign__independent_of_order():
+    dags = [ScheduledDag(f"dag_{i}", ["DOU"]) for i in range(100)]
+    spreader = ScheduleSpreader({"*": 2})
+
+    assert spreader.assign(dags) == spreader.assign(reversed(dags))
+
+
+def test_assign__budget_per_source():
+    dags = [ScheduledDag(f"dou_{i}", ["DOU"]) for i in range(30)] + [
+        ScheduledDag(f"qd_{i}", ["QD"]) for i in range(30)
+    ]
+
+    minutes = ScheduleSpreader({"*": 1, "DOU": 1, "QD": 2}).assign(dags)
+
+    assert len({minutes[f"dou_{i}"] for i in range(30)}) == 30
+    assert len({minutes[f"qd_{i}"] for i in range(30)}) >= 15
+
+
+def test_assign__runtimes_occupy_minutes():
+    dags = [ScheduledDag("long", ["DOU"])] + [
+        ScheduledDag(f"dag_{i}", ["DOU"]) for i in range(50)
+    ]
+
+    minutes = ScheduleSpreader({"*": 1}, runtimes={"long": 600}).assign(dags)
+
+    occupied = {(minutes["long"] + offset) % 60 for offset in range(10)}
+    assert not occupied & {minutes[f"dag_{i}"] for i in range(50)}
+
+
+def test_assign__over_budget_spreads_evenly():
+    dags = [ScheduledDag(f"dag_{i}", ["DOU"]) for i in range(600)]
+
+    minutes = ScheduleSpreader({"*": 1}).assign(dags)
+
+    per_minute = [list(minutes.values()).count(minute) for minute in range(60)]
+    assert max(per_minute) == min(per_minute) == 10
+
+
+def test_load_runtimes(tmp_path):
+    runtimes_file = tmp_path / "runtimes.json"
+    runtimes_file.write_text(json.dumps({"dag": 90, "other": "x"}))
+
+    assert load_runtimes(str(runtimes_file)) == {"dag": 90.0}
+    assert load_runtimes(str(tmp_path / "missing.json")) == {}
+    assert load_runtimes(None) == {}
+
+
+def test_load_plan(tmp_path):
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(json.dumps({"dag": 12, "other": "x"}))
+
+    assert load_plan(str(plan_file)) == {"dag": 12}
+    assert load_plan(None) == {}
+
+
+def _write_config(path, dag_id, schedule=None, sources=None, terms=("lgpd",)):
+    search = {"terms": list(terms)}
+    if sources is not None:
+        search["sources"] = sources
+    dag = {"id": dag_id, "search": search}
+    if schedule is not None:
+        dag["schedule"] = schedule
+    path.write_text(json.dumps({"dag": dag}))
+    return str(path)
+
+
+def test_read_scheduled_dag(tmp_path):
+    default = _write_config(tmp_path / "a.yaml", "a", sources=["QD", "DOU"])
+    scheduled = _write_config(tmp_path / "b.yaml", "b", schedule="0 8 * * *")
+
+    assert read_scheduled_dag(default) == ScheduledDag("a", ["DOU", "QD"])
+    assert read_scheduled_dag(default, harvest_enabled=True) is None
+    assert read_scheduled_dag(scheduled) is None
+
+
+def test_plan_schedules__skips_broken_files(tmp_path):
+    broken = tmp_path / "broken.yaml"
+    broken.write_text("dag: [")
+    filepaths = [
+        _write_config(tmp_path / "a.yaml", "a"),
+        str(broken),
+        _write_config(tmp_path / "b.yaml", "b"),
+    ]
+
+    minutes = plan_schedules(filepaths, {"*": 1})
+
+    assert set(minutes) == {"a", "b"}
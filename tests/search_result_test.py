@@ -0,0 +1,144 @@
+"""Search result helpers unit tests
+"""
+
+import copy
+import json
+
+from dags.ro_dou_src.utils.search_result import (
+    deduplicate_report,
+    highlight_terms,
+    intern_result,
+    iter_hits,
+    merge_results,
+)
+
+
+def _match(href: str) -> dict:
+    return {"section": "DOU - Seção 1", "href": href, "date": "01/04/2024"}
+
+
+def test_merge_results__keeps_order_and_inputs(merge_results_samples):
+    inputs = copy.deepcopy(merge_results_samples[:2])
+
+    merged = merge_results(*merge_results_samples[:2])
+
+    assert list(merged) == ["grupo_1", "grupo_2", "grupo_3"]
+    assert list(merged["grupo_1"]) == ["term_1", "term_2", "term_3", "term_10"]
+    assert list(merge_results_samples[:2]) == list(inputs)
+
+
+def test_merge_results__many_chunks():
+    chunks = [
+        {"single_group": {f"term_{i}": {"single_department": [_match(str(i))]}}}
+        for i in range(1000)
+    ] + [{"single_group": {"term_0": {"single_department": [_match("again")]}}}]
+
+    merged = merge_results(*chunks)
+
+    assert len(merged["single_group"]) == 1000
+    matches = merged["single_group"]["term_0"]["single_department"]
+    assert [match["href"] for match in matches] == ["0", "again"]
+
+
+def test_merge_results__same_term_in_many_chunks():
+    chunks = [
+        {"single_group": {"term": {"single_department": [_match(str(i))]}}}
+        for i in range(3)
+    ]
+    inputs = copy.deepcopy(chunks)
+
+    merged = merge_results(*chunks)
+
+    matches = merged["single_group"]["term"]["single_department"]
+    assert [match["href"] for match in matches] == ["0", "1", "2"]
+    assert chunks == inputs
+
+
+def test_merge_results__ignores_empty():
+    result = {"single_group": {"term": {"single_department": [_match("a")]}}}
+
+    assert merge_results({}, {"single_group": {}}, result) == result
+    assert merge_results({"single_group": {}}) == {}
+
+
+def test_intern_result():
+    matches = [_match("a"), _match("b")]
+    result = json.loads(
+        json.dumps({"single_group": {"term": {"single_department": matches}}})
+    )
+
+    intern_result(result)
+
+    first, second = result["single_group"]["term"]["single_department"]
+    assert first["section"] is second["section"]
+    assert first["date"] is second["date"]
+
+
+def test_iter_hits():
+    report = [
+        {
+            "header": None,
+            "result": {
+                "grupo": {
+                    "term": {"dpt_1": [_match("a")], "dpt_2": [_match("b")]},
+                }
+            },
+        },
+        {"header": "H", "result": {"single_group": {}}},
+    ]
+
+    hits = list(iter_hits(report))
+
+    assert [(h.group, h.term, h.department, h.match["href"]) for h in hits] == [
+        ("grupo", "term", "dpt_1", "a"),
+        ("grupo", "term", "dpt_2", "b"),
+    ]
+
+
+def test_highlight_terms():
+    text = "O <%%>Ministério</%%> da Saúde e a <b>saude</b> de SAÚDE."
+
+    assert highlight_terms(text, ["saude", "ministerio"]) == (
+        "O <%%>Ministério</%%> da <%%>Saúde</%%> e a <b><%%>saude</%%></b> "
+        "de <%%>SAÚDE</%%>."
+    )
+    assert highlight_terms("saudes", ["saude"]) == "saudes"
+
+
+def test_deduplicate_report():
+    dou_match = dict(_match("https://dou/1"), abstract="<%%>SILVA</%%> e SOUZA")
+    qd_match = {
+        "section": "QD - Edição ordinária ",
+        "href": "https://dou/1",
+        "abstract": "x",
+    }
+    report = [
+        {
+            "header": "H",
+            "department": None,
+            "result": {
+                "grupo_1": {"SILVA": {"single_department": [dou_match, _match("2")]}},
+                "grupo_2": {"SOUZA": {"single_department": [dict(dou_match)]}},
+                "grupo_3": {},
+            },
+        }
+    ]
+    original = copy.deepcopy(report)
+
+    deduplicated = deduplicate_report(report)
+
+    assert report == original
+    result = deduplicated[0]["result"]
+    assert list(result) == ["grupo_1", "grupo_3"]
+    publication, other = result["grupo_1"]["SILVA"]["single_department"]
+    assert publication["matched_terms"] == ["SILVA", "SOUZA"]
+    assert publication["matched_groups"] == ["grupo_1", "grupo_2"]
+    assert publication["sources"] == ["DOU"]
+    assert publication["abstract"] == "<%%>SILVA</%%> e <%%>SOUZA</%%>"
+    assert other["matched_terms"] == ["SILVA"]
+
+    report[0]["result"]["grupo_2"]["SOUZA"]["single_department"].append(qd_match)
+    publication = deduplicate_report(report)[0]["result"]["grupo_1"]["SILVA"][
+        "single_department"
+    ][0]
+    assert publication["sources"] == ["DOU", "QD"]
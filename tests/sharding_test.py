@@ -0,0 +1,94 @@
+"""DAG sharding unit tests
+"""
+
+import os
+
+import pytest
+
+from dags.ro_dou_src.sharding import (
+    ROOT_DIRECTORY,
+    config_subdirectory,
+    hash_shard,
+    select_shard,
+    write_stubs,
+)
+
+BASE_DIRS = ["/opt/airflow/dags/ro_dou/dag_confs"]
+FILES = [
+    f"{BASE_DIRS[0]}/{path}"
+    for path in (
+        "root_example.yaml",
+        "team_a/first.yaml",
+        "team_a/second.yaml",
+        "team_b/nested/third.yaml",
+    )
+]
+
+
+def test_hash_shard__stable_across_mount_points():
+    moved = "/mnt/confs/team_a/first.yaml"
+
+    assert hash_shard(FILES[1], BASE_DIRS, 7) == hash_shard(
+        moved, ["/mnt/confs"], 7
+    )
+
+
+@pytest.mark.parametrize("shard_count", [1, 2, 3, 10])
+def test_select_shard__partition(shard_count):
+    shards = [
+        select_shard(FILES, BASE_DIRS, shard_index=i, shard_count=shard_count)
+        for i in range(shard_count)
+    ]
+
+    assert sorted(sum(shards, [])) == sorted(FILES)
+
+
+@pytest.mark.parametrize(
+    "filepath, subdirectory",
+    [
+        (FILES[0], ROOT_DIRECTORY),
+        (FILES[1], "team_a"),
+        (FILES[3], "team_b"),
+    ],
+)
+def test_config_subdirectory(filepath, subdirectory):
+    assert config_subdirectory(filepath, BASE_DIRS) == subdirectory
+
+
+def test_select_shard__subdirectory():
+    assert select_shard(FILES, BASE_DIRS, subdirectory="team_a") == FILES[1:3]
+
+
+def test_select_shard__no_sharding():
+    assert select_shard(FILES, BASE_DIRS) == FILES
+
+
+def test_write_stubs(tmp_path):
+    (tmp_path / "ro_dou_shard_old.py").write_text("")
+
+    stubs = write_stubs(str(tmp_path), str(tmp_path / "ro_dou_src"), shard_count=3)
+
+    assert sorted(os.listdir(tmp_path)) == [
+        "ro_dou_shard_-harvest.py",
+        "ro_dou_shard_000.py",
+        "ro_dou_shard_001.py",
+        "ro_dou_shard_002.py",
+    ]
+    content = open(stubs[1], encoding="utf-8").read()
+    # Airflow safe mode only parses files mentioning both words
+    assert "airflow" in content.lower() and "dag" in content.lower()
+    assert "shard_index=1, shard_count=3" in content
+    compile(content, stubs[1], "exec")
+
+
+def test_write_stubs__harvest_stub(tmp_path):
+    stubs = write_stubs(
+        str(tmp_path), str(tmp_path / "ro_dou_src"), subdirectories=["harvest"]
+    )
+
+    assert [os.path.basename(stub) for stub in stubs] == [
+        "ro_dou_shard_harvest.py",
+        "ro_dou_shard_-harvest.py",
+    ]
+    assert "harvest=True" in open(stubs[1], encoding="utf-8").read()
+    assert "harvest=True" not in open(stubs[0], encoding="utf-8").read()
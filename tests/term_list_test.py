@@ -0,0 +1,72 @@
+"""TermList unit tests
+"""
+
+import pytest
+
+from dags.ro_dou_src.utils.term_list import MAX_DISPLAYED_TERMS, TermList
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        '{"nome": {"0": "ANTONIO DE OLIVEIRA", "1": "SILVA"}, '
+        '"cargo": {"0": "EPPGG", "1": "ATI"}}',
+        "{'nome': {'0': 'ANTONIO DE OLIVEIRA', '1': 'SILVA'}, "
+        "'cargo': {'0': 'EPPGG', '1': 'ATI'}}",
+        {"terms": ["ANTONIO DE OLIVEIRA", "SILVA"], "groups": ["EPPGG", "ATI"]},
+        TermList(["ANTONIO DE OLIVEIRA", "SILVA"], ["EPPGG", "ATI"]),
+    ],
+)
+def test_parse__grouped_representations(value):
+    term_list = TermList.parse(value)
+
+    assert term_list.terms == ["ANTONIO DE OLIVEIRA", "SILVA"]
+    assert term_list.group_map == {"ANTONIO DE OLIVEIRA": "EPPGG", "SILVA": "ATI"}
+
+
+def test_parse__rows_in_numeric_order():
+    columns = {"termo": {str(i): f"Pessoa {i}" for i in (10, 2, 0, 1)}}
+
+    assert TermList.parse(columns).terms == [
+        "Pessoa 0",
+        "Pessoa 1",
+        "Pessoa 2",
+        "Pessoa 10",
+    ]
+
+
+def test_parse__keeps_numeric_terms_as_str():
+    assert TermList.parse('{"cpf": {"0": "01234567890"}}').terms == ["01234567890"]
+
+
+def test_parse__list():
+    term_list = TermList.parse(["a", "b"])
+
+    assert term_list.terms == ["a", "b"]
+    assert term_list.groups is None
+
+
+def test_parse__invalid():
+    with pytest.raises(TypeError):
+        TermList.parse(42)
+
+
+def test_slice_and_round_trip():
+    term_list = TermList(["a", "b", "c"], ["x", "y", "z"])
+
+    assert term_list[1:] == TermList(["b", "c"], ["y", "z"])
+    assert TermList.parse(term_list.to_dict()) == term_list
+    assert list(term_list) == ["a", "b", "c"]
+    assert len(term_list) == 3
+
+
+def test_mismatched_groups():
+    with pytest.raises(ValueError):
+        TermList(["a", "b"], ["x"])
+
+
+def test_str__truncated():
+    assert str(TermList(["a", "b"], ["x", "y"])) == "a, b"
+    assert str(TermList([f"t{i}" for i in range(MAX_DISPLAYED_TERMS + 2)])).endswith(
+        f"t{MAX_DISPLAYED_TERMS - 1} (+2 more)"
+    )
@@ -7,7 +7,7 @@ currentdir = os.path.dirname(
     os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
-from notification.isender import _fix_missing_spaces
+from notification.isender import ISender, _fix_missing_spaces
 
 
 def test_fix_missing_spaces():
@@ -25,3 +25,38 @@ def test_fix_missing_spaces():
     ]
     for string, expected_result in test_cases:
         assert _fix_missing_spaces(string) == expected_result
+
+
+class _RecordingSender(ISender):
+    highlight_tags = ("*", "*")
+
+    def __init__(self):
+        self.rendered = []
+
+    def send(self, search_report: list, report_date: str = None):
+        for search in search_report:
+            for terms in search["result"].values():
+                for departments in terms.values():
+                    for matches in departments.values():
+                        self.rendered += [
+                            self.highlight(match["abstract"]) for match in matches
+                        ]
+
+
+def test_send_report__highlights_without_changing_the_report():
+    abstract = "Nomear<%%>Fulano</%%>para o cargo"
+    search_report = [
+        {
+            "header": None,
+            "result": {"single_group": {"fulano": {"single_department": [
+                {"abstract": abstract},
+                {"abstract": "Sem destaques"},
+            ]}}},
+        }
+    ]
+    sender = _RecordingSender()
+    sender.send_report(search_report, "2024-01-01")
+
+    assert sender.rendered == ["Nomear *Fulano* para o cargo", "Sem destaques"]
+    matches = search_report[0]["result"]["single_group"]["fulano"]
+    assert matches["single_department"][0]["abstract"] == abstract
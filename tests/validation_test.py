@@ -0,0 +1,72 @@
+"""YAML fast validation unit tests
+"""
+
+import glob
+
+import pytest
+
+from dags.ro_dou_src import validation
+from dags.ro_dou_src.validation import find_config_files, validate_file, validate_files
+
+YAMLS_DIR = "../dags/ro_dou/dag_confs"
+
+INVALID_CONFIG = """
+dag:
+  id: invalid_example
+  description: DAG de teste
+  search:
+    terms: [ "cimentodaaroeira" ]
+"""
+
+
+@pytest.mark.parametrize(
+    "data_file",
+    glob.glob(f"{YAMLS_DIR}/**/*.yml", recursive=True)
+    + glob.glob(f"{YAMLS_DIR}/**/*.yaml", recursive=True),
+)
+def test_validate_file__examples(data_file):
+    summary = validate_file(data_file)
+
+    assert summary.errors == []
+    assert summary.dag_id
+
+
+def test_validate_file__missing_report(tmp_path):
+    filepath = tmp_path / "invalid.yaml"
+    filepath.write_text(INVALID_CONFIG)
+
+    summary = validate_file(str(filepath))
+
+    assert not summary.is_valid
+    assert summary.errors == ["dag: 'report' is a required property"]
+
+
+def test_validate_file__broken_yaml(tmp_path):
+    filepath = tmp_path / "broken.yaml"
+    filepath.write_text("dag: [unclosed")
+
+    summary = validate_file(str(filepath))
+
+    assert summary.dag_id is None
+    assert summary.errors[0].startswith("<arquivo>:")
+
+
+def test_validate_files__duplicated_dag_id(tmp_path):
+    source = f"{YAMLS_DIR}/examples_and_tests/basic_example.yaml"
+    for name in ("a.yaml", "b.yaml"):
+        (tmp_path / name).write_text(open(source, encoding="utf-8").read())
+
+    summaries = validate_files(find_config_files([str(tmp_path)]))
+
+    assert all(not summary.is_valid for summary in summaries)
+    assert "basic_example" in summaries[0].errors[0]
+
+
+def test_validate_files__parallel_matches_serial(monkeypatch):
+    files = find_config_files([YAMLS_DIR])
+    serial = validate_files(files, workers=1)
+    monkeypatch.setattr(validation, "MIN_PARALLEL_FILES", 1)
+
+    parallel = validate_files(files, workers=2)
+
+    assert parallel == serial